@@ -1,4 +1,10 @@
+import asyncio
 from nanostudio_2_sample_converter.formats.sfz.sfz import Sfz
+from nanostudio_2_sample_converter.formats.sfz.utils.audio_cache import (
+    AudioCache,
+    AUDIO_CACHE_MAX_BYTES,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.ir_cache import IrCache
 from nanostudio_2_sample_converter.utils.utils import create_parser, create_args
 
 
@@ -6,10 +12,29 @@ def main():
     parser = create_parser()
     args = create_args(parser.parse_args())
     if args:
-        convert(args)
+        asyncio.run(convert(args))
 
 
-def convert(args):
-    sample_patch = Sfz(args["source"], args["destination"], args["destination_format"])
+async def convert(args):
+    ir_cache = None if args["no_cache"] else IrCache()
+    audio_cache = None
+    if not args["no_cache"]:
+        max_bytes = AUDIO_CACHE_MAX_BYTES
+        if args["cache_size"] is not None:
+            max_bytes = args["cache_size"] * 1024 * 1024
+        audio_cache = AudioCache(max_bytes=max_bytes)
+    sample_patch = Sfz(
+        args["source"],
+        args["destination"],
+        args["destination_format"],
+        ir_cache=ir_cache,
+        audio_cache=audio_cache,
+        jobs=args["jobs"],
+        timeout=args["timeout"],
+        link_mode=args["link_mode"],
+    )
+    await sample_patch.convert()
     sample_patch.export()
+    if args["timings"]:
+        print(sample_patch.pass_manager.report())
     print("Success! Sample patch has been saved to " + args['destination'] + ".")
@@ -0,0 +1,42 @@
+"""
+Sfz compiled schema
+Immutable lookup structures compiled once from schema.py and the opcode database at import time.
+Opcode and header names are interned, membership tests use frozensets and dicts.
+"""
+from sys import intern
+from nanostudio_2_sample_converter.formats.sfz import schema
+from nanostudio_2_sample_converter.formats.sfz.opcodes import get_level_opcodes
+
+
+def compile_opcodes(opcodes):
+    return frozenset(intern(opcode) for opcode in opcodes)
+
+
+class HeaderSpec:
+    __slots__ = ("header", "opcodes", "obsidian_opcode_rename")
+
+    def __init__(self, header_schema):
+        """
+        Args:
+            header_schema (dict): Header dictionary from schema.py, e.g. schema.REGION.
+        """
+        self.header = intern(header_schema[schema.HEADER])
+        self.opcodes = get_level_opcodes(self.header)
+        self.obsidian_opcode_rename = {
+            intern(opcode): obsidian_key
+            for (opcode, obsidian_key) in header_schema[
+                "obsidian_opcode_rename"
+            ].items()
+        }
+
+
+HEADER_SPECS = {spec.header: spec for spec in map(HeaderSpec, schema.SFZ)}
+
+REGION = HEADER_SPECS[schema.REGION[schema.HEADER]]
+GROUP = HEADER_SPECS[schema.GROUP[schema.HEADER]]
+GLOBAL = HEADER_SPECS[schema.GLOBAL[schema.HEADER]]
+CONTROL = HEADER_SPECS[schema.CONTROL[schema.HEADER]]
+
+KEY_OPCODES = compile_opcodes(schema.KEY_OPCODES)
+TRANSPOSE_OPCODES = compile_opcodes(schema.TRANSPOSE_OPCODES)
+SAMPLE_EDIT_OPCODES = compile_opcodes(schema.SAMPLE_EDIT_OPCODES)
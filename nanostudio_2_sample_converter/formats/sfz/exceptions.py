@@ -45,3 +45,67 @@ class DirectoryExistsException(Exception):
     """
 
     pass
+
+
+class SfzInvalidKeyException(Exception):
+    """
+    Indicates a key opcode value is not a valid MIDI key number or note name.
+    """
+
+    pass
+
+
+class SfzInvalidOpcodeValueException(Exception):
+    """
+    Indicates an opcode value is not of the opcode type or is out of range.
+    """
+
+    pass
+
+
+class SfzIncludeDoesNotExistException(Exception):
+    """
+    Indicates a file included by the sfz does not exist.
+    """
+
+    pass
+
+
+class SfzRecursiveIncludeException(Exception):
+    """
+    Indicates an sfz file includes itself, directly or through other included files.
+    """
+
+    pass
+
+
+class FfmpegDecodeException(Exception):
+    """
+    Indicates that ffmpeg could not decode or encode an audio file.
+    """
+
+    pass
+
+
+class FfmpegTimeoutException(Exception):
+    """
+    Indicates that ffmpeg did not finish converting an audio file in time.
+    """
+
+    pass
+
+
+class AudioProbeException(Exception):
+    """
+    Indicates the header of an audio file could not be read.
+    """
+
+    pass
+
+
+class SfzNotConvertedException(Exception):
+    """
+    Indicates an sfz patch was exported before its samples were converted.
+    """
+
+    pass
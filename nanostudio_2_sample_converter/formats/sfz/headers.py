@@ -0,0 +1,160 @@
+"""
+Sfz header classes
+Compact intermediate representation of an sfz instrument: control -> global -> group -> region.
+Opcode values are typed once when the sfz is parsed. lxml is only used to render the tree.
+Each header only stores its own opcodes, inherited opcodes are looked up through its parents.
+"""
+from collections import ChainMap
+from lxml import etree as ET
+from nanostudio_2_sample_converter.formats.sfz.compiled_schema import (
+    REGION,
+    GROUP,
+    GLOBAL,
+    CONTROL,
+)
+from nanostudio_2_sample_converter.formats.sfz.schema import (
+    LO_KEY,
+    HI_KEY,
+    LO_VEL,
+    HI_VEL,
+    PITCH_KEYCENTER,
+    SAMPLE,
+)
+
+
+class Header:
+    __slots__ = ("opcodes", "parent")
+
+    SPEC = None
+
+    def __init__(self, opcodes=None):
+        self.opcodes = opcodes if opcodes is not None else {}
+        self.parent = None
+
+    @property
+    def effective_opcodes(self):
+        """
+        Returns a ChainMap of the opcodes of this header and its parents, nearest header first.
+        Nothing is copied, writes go to this header's own opcodes.
+        """
+        maps = []
+        header = self
+        while header is not None:
+            maps.append(header.opcodes)
+            header = header.parent
+        return ChainMap(*maps)
+
+    def get_opcode(self, opcode, default=None):
+        """
+        Returns the effective value of a single opcode without building the ChainMap.
+        """
+        header = self
+        while header is not None:
+            if opcode in header.opcodes:
+                return header.opcodes[opcode]
+            header = header.parent
+        return default
+
+    @property
+    def header(self):
+        return self.SPEC.header
+
+    def to_xml(self, parent=None):
+        element = (
+            ET.Element(self.header)
+            if parent is None
+            else ET.SubElement(parent, self.header)
+        )
+        for opcode, value in self.opcodes.items():
+            element.set(opcode, str(value))
+        return element
+
+
+class ParentHeader(Header):
+    __slots__ = ("children",)
+
+    def __init__(self, opcodes=None, children=None):
+        super().__init__(opcodes)
+        self.children = []
+        for child in children or []:
+            self.add_child(child)
+
+    def add_child(self, child):
+        child.parent = self
+        self.children.append(child)
+
+    def to_xml(self, parent=None):
+        element = super().to_xml(parent)
+        for child in self.children:
+            child.to_xml(element)
+        return element
+
+
+class Region(Header):
+    __slots__ = ()
+
+    SPEC = REGION
+
+    @property
+    def sample(self):
+        return self.get_opcode(SAMPLE)
+
+    @property
+    def lokey(self):
+        return self.get_opcode(LO_KEY)
+
+    @property
+    def hikey(self):
+        return self.get_opcode(HI_KEY)
+
+    @property
+    def pitch_keycenter(self):
+        return self.get_opcode(PITCH_KEYCENTER)
+
+
+class Group(ParentHeader):
+    __slots__ = ()
+
+    SPEC = GROUP
+
+    @property
+    def lovel(self):
+        return self.get_opcode(LO_VEL)
+
+    @property
+    def hivel(self):
+        return self.get_opcode(HI_VEL)
+
+
+class Global(ParentHeader):
+    __slots__ = ()
+
+    SPEC = GLOBAL
+
+
+class Control(ParentHeader):
+    __slots__ = ()
+
+    SPEC = CONTROL
+
+    def iter_groups(self):
+        for global_header in self.children:
+            yield from global_header.children
+
+    def iter_regions(self):
+        for group in self.iter_groups():
+            yield from group.children
+
+    def iter(self):
+        yield self
+        for global_header in self.children:
+            yield global_header
+            for group in global_header.children:
+                yield group
+                yield from group.children
+
+
+HEADER_CLASSES = {
+    header_class.SPEC.header: header_class
+    for header_class in [Region, Group, Global, Control]
+}
@@ -0,0 +1,456 @@
+"""
+Sfz opcode database
+Every sfz v1 and v2 opcode with its type, range, aliases and the header level the converter keeps
+it at. Opcodes without a level are recognised but dropped during conversion.
+Note: opcodes taken from sfzformat.com. N in an opcode name stands for any number.
+"""
+import re
+from functools import lru_cache
+from sys import intern
+from nanostudio_2_sample_converter.formats.sfz import schema
+from nanostudio_2_sample_converter.formats.sfz.exceptions import (
+    SfzInvalidOpcodeValueException,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.notes import (
+    convert_key_string_to_key_number,
+)
+
+KEY = "key"
+INTEGER = "integer"
+FLOAT = "float"
+STRING = "string"
+
+REGION_LEVEL = schema.REGION[schema.HEADER]
+GROUP_LEVEL = schema.GROUP[schema.HEADER]
+
+MAX_SAMPLE = 4294967296
+
+NUMBER_REGEX = re.compile(r"\d+")
+PLACEHOLDER = "N"
+
+
+class Opcode:
+    __slots__ = ("name", "type", "minimum", "maximum", "level")
+
+    def __init__(self, name, value_type, minimum, maximum, level=None):
+        """
+        Args:
+            name (str): Canonical opcode name.
+            value_type (str): KEY, INTEGER, FLOAT or STRING.
+            minimum (int|float): Lowest valid value, None if unbounded.
+            maximum (int|float): Highest valid value, None if unbounded.
+            level (str): Header the converter keeps the opcode at, None if it is dropped.
+        """
+        self.name = intern(name)
+        self.type = value_type
+        self.minimum = minimum
+        self.maximum = maximum
+        self.level = level
+
+    def convert(self, value):
+        """
+        Returns the typed value of an opcode, raising SfzInvalidOpcodeValueException if the
+        value is not of the opcode type or is out of range.
+        """
+        if self.type == STRING:
+            return value
+        if self.type == KEY:
+            return convert_key_string_to_key_number(value)
+        try:
+            typed_value = int(value) if self.type == INTEGER else float(value)
+        except ValueError:
+            raise SfzInvalidOpcodeValueException(
+                f"Invalid value '{value}' for opcode '{self.name}'. Expected {self.type}."
+            ) from None
+        if (self.minimum is not None and typed_value < self.minimum) or (
+            self.maximum is not None and typed_value > self.maximum
+        ):
+            raise SfzInvalidOpcodeValueException(
+                f"Invalid value '{value}' for opcode '{self.name}'. "
+                f"Expected {self.minimum} to {self.maximum}."
+            )
+        return typed_value
+
+
+def create_envelope_opcodes(prefix, depth_range=None):
+    envelope_opcodes = [
+        (f"{prefix}_delay", FLOAT, 0, 100),
+        (f"{prefix}_start", FLOAT, 0, 100),
+        (f"{prefix}_attack", FLOAT, 0, 100),
+        (f"{prefix}_hold", FLOAT, 0, 100),
+        (f"{prefix}_decay", FLOAT, 0, 100),
+        (f"{prefix}_sustain", FLOAT, 0, 100),
+        (f"{prefix}_release", FLOAT, 0, 100),
+        (f"{prefix}_vel2delay", FLOAT, -100, 100),
+        (f"{prefix}_vel2attack", FLOAT, -100, 100),
+        (f"{prefix}_vel2hold", FLOAT, -100, 100),
+        (f"{prefix}_vel2decay", FLOAT, -100, 100),
+        (f"{prefix}_vel2sustain", FLOAT, -100, 100),
+        (f"{prefix}_vel2release", FLOAT, -100, 100),
+        (f"{prefix}_delay_onccN", FLOAT, -100, 100, (f"{prefix}_delayccN",)),
+        (f"{prefix}_start_onccN", FLOAT, -100, 100, (f"{prefix}_startccN",)),
+        (f"{prefix}_attack_onccN", FLOAT, -100, 100, (f"{prefix}_attackccN",)),
+        (f"{prefix}_hold_onccN", FLOAT, -100, 100, (f"{prefix}_holdccN",)),
+        (f"{prefix}_decay_onccN", FLOAT, -100, 100, (f"{prefix}_decayccN",)),
+        (f"{prefix}_sustain_onccN", FLOAT, -100, 100, (f"{prefix}_sustainccN",)),
+        (f"{prefix}_release_onccN", FLOAT, -100, 100, (f"{prefix}_releaseccN",)),
+        (f"{prefix}_attack_shape", FLOAT, None, None),
+        (f"{prefix}_decay_shape", FLOAT, None, None),
+        (f"{prefix}_release_shape", FLOAT, None, None),
+        (f"{prefix}_decay_zero", INTEGER, 0, 1),
+        (f"{prefix}_release_zero", INTEGER, 0, 1),
+        (f"{prefix}_dynamic", INTEGER, 0, 1),
+    ]
+    if depth_range is not None:
+        depth_minimum, depth_maximum = depth_range
+        envelope_opcodes += [
+            (f"{prefix}_depth", FLOAT, depth_minimum, depth_maximum),
+            (f"{prefix}_vel2depth", FLOAT, depth_minimum, depth_maximum),
+            (f"{prefix}_depth_onccN", FLOAT, depth_minimum, depth_maximum),
+        ]
+    return envelope_opcodes
+
+
+def create_lfo_opcodes(prefix, depth_range):
+    depth_minimum, depth_maximum = depth_range
+    return [
+        (f"{prefix}_delay", FLOAT, 0, 100),
+        (f"{prefix}_fade", FLOAT, 0, 100),
+        (f"{prefix}_freq", FLOAT, 0, 20),
+        (f"{prefix}_depth", FLOAT, depth_minimum, depth_maximum),
+        (f"{prefix}_depth_onccN", FLOAT, depth_minimum, depth_maximum),
+        (f"{prefix}_depthccN", FLOAT, depth_minimum, depth_maximum),
+        (f"{prefix}_depthchanaft", FLOAT, depth_minimum, depth_maximum),
+        (f"{prefix}_depthpolyaft", FLOAT, depth_minimum, depth_maximum),
+        (f"{prefix}_freqccN", FLOAT, -200, 200),
+        (f"{prefix}_freqchanaft", FLOAT, -200, 200),
+        (f"{prefix}_freqpolyaft", FLOAT, -200, 200),
+    ]
+
+
+OPCODE_TABLE = [
+    # name, type, minimum, maximum, aliases, level
+    # Sound source
+    ("sample", STRING, None, None, (), REGION_LEVEL),
+    ("default_path", STRING, None, None, (), REGION_LEVEL),
+    ("delay", FLOAT, 0, 100),
+    ("delay_random", FLOAT, 0, 100),
+    ("delay_onccN", FLOAT, 0, 100, ("delay_ccN",)),
+    ("delay_samples", INTEGER, 0, None),
+    ("delay_samples_onccN", INTEGER, 0, None),
+    ("offset", INTEGER, 0, MAX_SAMPLE, (), REGION_LEVEL),
+    ("offset_random", INTEGER, 0, MAX_SAMPLE),
+    ("offset_onccN", INTEGER, 0, MAX_SAMPLE, ("offset_ccN",)),
+    ("offset_mode", STRING, None, None),
+    ("end", INTEGER, -1, MAX_SAMPLE, (), REGION_LEVEL),
+    ("end_onccN", INTEGER, -MAX_SAMPLE, MAX_SAMPLE, ("end_ccN",)),
+    ("count", INTEGER, 0, MAX_SAMPLE),
+    ("loop_mode", STRING, None, None, ("loopmode",), REGION_LEVEL),
+    ("loop_start", INTEGER, 0, MAX_SAMPLE, ("loopstart",), REGION_LEVEL),
+    ("loop_end", INTEGER, 0, MAX_SAMPLE, ("loopend",), REGION_LEVEL),
+    ("loop_count", INTEGER, 0, None, ("loopcount",)),
+    ("loop_type", STRING, None, None, ("looptype",)),
+    ("loop_crossfade", FLOAT, 0, None),
+    ("loop_start_onccN", INTEGER, -MAX_SAMPLE, MAX_SAMPLE, ("loop_start_ccN",)),
+    ("loop_end_onccN", INTEGER, -MAX_SAMPLE, MAX_SAMPLE, ("loop_end_ccN",)),
+    ("sync_beats", FLOAT, 0, 32),
+    ("sync_offset", FLOAT, 0, 32),
+    ("direction", STRING, None, None, (), REGION_LEVEL),
+    ("sample_fadeout", FLOAT, 0, None),
+    ("sample_quality", INTEGER, 0, 10),
+    ("oscillator", STRING, None, None),
+    ("oscillator_phase", FLOAT, -1, 360),
+    ("oscillator_quality", INTEGER, 0, 3),
+    ("oscillator_table_size", INTEGER, 0, None),
+    ("oscillator_mode", INTEGER, 0, 2),
+    ("oscillator_multi", INTEGER, 1, 9),
+    ("oscillator_detune", FLOAT, None, None),
+    ("oscillator_detune_onccN", FLOAT, None, None),
+    ("oscillator_mod_depth", FLOAT, 0, None),
+    ("oscillator_mod_depth_onccN", FLOAT, None, None),
+    # Instrument settings
+    ("octave_offset", INTEGER, -10, 10, (), REGION_LEVEL),
+    ("note_offset", INTEGER, -127, 127, (), REGION_LEVEL),
+    ("set_ccN", FLOAT, 0, 127),
+    ("set_hdccN", FLOAT, 0, 1),
+    ("set_realccN", FLOAT, -1, 1),
+    ("label_ccN", STRING, None, None),
+    ("label_keyN", STRING, None, None),
+    ("global_label", STRING, None, None),
+    ("master_label", STRING, None, None),
+    ("group_label", STRING, None, None),
+    ("region_label", STRING, None, None),
+    ("hint_ram_based", INTEGER, 0, 1),
+    ("hint_stealing", STRING, None, None),
+    ("hint_sustain_cancels_release", INTEGER, 0, 1),
+    # Voice lifecycle
+    ("group", INTEGER, None, None, ("polyphony_group",)),
+    ("off_by", INTEGER, None, None, ("offby",)),
+    ("off_mode", STRING, None, None),
+    ("off_time", FLOAT, 0, None),
+    ("off_curve", INTEGER, -2, 255),
+    ("off_shape", FLOAT, None, None),
+    ("polyphony", INTEGER, 0, None),
+    ("note_polyphony", INTEGER, 0, None),
+    ("note_selfmask", STRING, None, None),
+    ("rt_dead", STRING, None, None),
+    ("output", INTEGER, 0, 1024),
+    # Key mapping
+    ("key", KEY, 0, 127, (), REGION_LEVEL),
+    ("lokey", KEY, 0, 127, (), REGION_LEVEL),
+    ("hikey", KEY, 0, 127, (), REGION_LEVEL),
+    ("lovel", INTEGER, 0, 127, (), GROUP_LEVEL),
+    ("hivel", INTEGER, 0, 127, (), GROUP_LEVEL),
+    # MIDI conditions
+    ("lochan", INTEGER, 1, 16),
+    ("hichan", INTEGER, 1, 16),
+    ("loccN", FLOAT, 0, 127),
+    ("hiccN", FLOAT, 0, 127),
+    ("lohdccN", FLOAT, 0, 1),
+    ("hihdccN", FLOAT, 0, 1),
+    ("lobend", INTEGER, -8192, 8192),
+    ("hibend", INTEGER, -8192, 8192),
+    ("lochanaft", INTEGER, 0, 127),
+    ("hichanaft", INTEGER, 0, 127),
+    ("lopolyaft", INTEGER, 0, 127),
+    ("hipolyaft", INTEGER, 0, 127),
+    ("loprog", INTEGER, 0, 127),
+    ("hiprog", INTEGER, 0, 127),
+    ("sw_lokey", KEY, 0, 127),
+    ("sw_hikey", KEY, 0, 127),
+    ("sw_last", KEY, 0, 127),
+    ("sw_lolast", KEY, 0, 127),
+    ("sw_hilast", KEY, 0, 127),
+    ("sw_down", KEY, 0, 127),
+    ("sw_up", KEY, 0, 127),
+    ("sw_previous", KEY, 0, 127),
+    ("sw_default", KEY, 0, 127),
+    ("sw_label", STRING, None, None),
+    ("sw_vel", STRING, None, None),
+    # Internal conditions
+    ("lorand", FLOAT, 0, 1),
+    ("hirand", FLOAT, 0, 1),
+    ("lobpm", FLOAT, 0, 500),
+    ("hibpm", FLOAT, 0, 500),
+    ("lotimer", FLOAT, 0, None),
+    ("hitimer", FLOAT, 0, None),
+    ("seq_length", INTEGER, 1, 100),
+    ("seq_position", INTEGER, 1, 100),
+    # Triggers
+    ("trigger", STRING, None, None),
+    ("on_loccN", FLOAT, -1, 127),
+    ("on_hiccN", FLOAT, -1, 127),
+    ("on_lohdccN", FLOAT, -1, 1),
+    ("on_hihdccN", FLOAT, -1, 1),
+    ("start_loccN", FLOAT, -1, 127),
+    ("start_hiccN", FLOAT, -1, 127),
+    ("stop_loccN", FLOAT, -1, 127),
+    ("stop_hiccN", FLOAT, -1, 127),
+    # Amplifier
+    ("volume", FLOAT, -144, 6),
+    ("volume_onccN", FLOAT, -144, 48, ("gain_ccN", "gain_onccN")),
+    ("amplitude", FLOAT, 0, 100),
+    ("amplitude_onccN", FLOAT, -100, 100, ("amplitude_ccN",)),
+    ("pan", FLOAT, -100, 100),
+    ("pan_onccN", FLOAT, -200, 200, ("pan_ccN",)),
+    ("pan_law", STRING, None, None),
+    ("width", FLOAT, -100, 100),
+    ("width_onccN", FLOAT, -200, 200, ("width_ccN",)),
+    ("position", FLOAT, -100, 100),
+    ("position_onccN", FLOAT, -200, 200, ("position_ccN",)),
+    ("amp_keytrack", FLOAT, -96, 12),
+    ("amp_keycenter", KEY, 0, 127),
+    ("amp_veltrack", FLOAT, -100, 100),
+    ("amp_veltrack_onccN", FLOAT, -100, 100),
+    ("amp_velcurve_N", FLOAT, 0, 1),
+    ("amp_random", FLOAT, 0, 24),
+    ("rt_decay", FLOAT, 0, 200),
+    ("rt_decayN", FLOAT, 0, 200),
+    ("xfin_lokey", KEY, 0, 127),
+    ("xfin_hikey", KEY, 0, 127),
+    ("xfout_lokey", KEY, 0, 127),
+    ("xfout_hikey", KEY, 0, 127),
+    ("xf_keycurve", STRING, None, None),
+    ("xfin_lovel", INTEGER, 0, 127),
+    ("xfin_hivel", INTEGER, 0, 127),
+    ("xfout_lovel", INTEGER, 0, 127),
+    ("xfout_hivel", INTEGER, 0, 127),
+    ("xf_velcurve", STRING, None, None),
+    ("xfin_loccN", FLOAT, 0, 127),
+    ("xfin_hiccN", FLOAT, 0, 127),
+    ("xfout_loccN", FLOAT, 0, 127),
+    ("xfout_hiccN", FLOAT, 0, 127),
+    ("xf_cccurve", STRING, None, None),
+    # Pitch
+    ("transpose", INTEGER, -127, 127, (), REGION_LEVEL),
+    ("tune", INTEGER, -9600, 9600, ("pitch",), GROUP_LEVEL),
+    ("tune_onccN", FLOAT, -9600, 9600, ("pitch_onccN", "pitch_ccN")),
+    ("pitch_keycenter", KEY, 0, 127, (), REGION_LEVEL),
+    ("pitch_keytrack", FLOAT, -1200, 1200),
+    ("pitch_veltrack", FLOAT, -9600, 9600),
+    ("pitch_random", FLOAT, 0, 9600),
+    ("bend_up", FLOAT, -9600, 9600, ("bendup",)),
+    ("bend_down", FLOAT, -9600, 9600, ("benddown",)),
+    ("bend_step", FLOAT, 1, 1200),
+    ("bend_smooth", FLOAT, 0, 100),
+    # Filter
+    ("fil_type", STRING, None, None, ("filtype",)),
+    ("filN_type", STRING, None, None),
+    ("cutoff", FLOAT, 0, None),
+    ("cutoffN", FLOAT, 0, None),
+    ("cutoff_onccN", FLOAT, -9600, 9600, ("cutoff_ccN",)),
+    ("cutoffN_onccN", FLOAT, -9600, 9600, ("cutoffN_ccN",)),
+    ("cutoff_chanaft", FLOAT, -9600, 9600),
+    ("cutoff_polyaft", FLOAT, -9600, 9600),
+    ("resonance", FLOAT, 0, 40),
+    ("resonanceN", FLOAT, 0, 40),
+    ("resonance_onccN", FLOAT, -40, 40, ("resonance_ccN",)),
+    ("resonanceN_onccN", FLOAT, -40, 40, ("resonanceN_ccN",)),
+    ("fil_keytrack", FLOAT, 0, 1200),
+    ("filN_keytrack", FLOAT, 0, 1200),
+    ("fil_keycenter", KEY, 0, 127),
+    ("filN_keycenter", KEY, 0, 127),
+    ("fil_veltrack", FLOAT, -9600, 9600),
+    ("filN_veltrack", FLOAT, -9600, 9600),
+    ("fil_random", FLOAT, 0, 9600, ("cutoff_random",)),
+    ("fil_gain", FLOAT, -96, 96),
+    ("filN_gain", FLOAT, -96, 96),
+    # Equalizer
+    ("eqN_freq", FLOAT, 0, 30000),
+    ("eqN_bw", FLOAT, 0.001, 4),
+    ("eqN_gain", FLOAT, -96, 24),
+    ("eqN_vel2freq", FLOAT, -30000, 30000),
+    ("eqN_vel2gain", FLOAT, -96, 24),
+    ("eqN_freq_onccN", FLOAT, -30000, 30000, ("eqN_freqccN",)),
+    ("eqN_bw_onccN", FLOAT, -4, 4, ("eqN_bwccN",)),
+    ("eqN_gain_onccN", FLOAT, -96, 24, ("eqN_gainccN",)),
+    ("eqN_type", STRING, None, None),
+    # Flexible envelope generators
+    ("egN_timeN", FLOAT, 0, 100),
+    ("egN_timeN_onccN", FLOAT, -100, 100),
+    ("egN_levelN", FLOAT, -1, 1),
+    ("egN_levelN_onccN", FLOAT, -1, 1),
+    ("egN_shapeN", FLOAT, None, None),
+    ("egN_curveN", INTEGER, 0, 255),
+    ("egN_points", INTEGER, 0, None),
+    ("egN_sustain", INTEGER, 0, None),
+    ("egN_loop", INTEGER, 0, None),
+    ("egN_loop_count", INTEGER, 0, None),
+    ("egN_dynamic", INTEGER, 0, 1),
+    ("egN_amplitude", FLOAT, 0, 100, ("egN_ampeg",)),
+    ("egN_amplitude_onccN", FLOAT, -100, 100),
+    ("egN_volume", FLOAT, -144, 48),
+    ("egN_volume_onccN", FLOAT, -144, 48),
+    ("egN_pitch", FLOAT, -9600, 9600),
+    ("egN_pitch_onccN", FLOAT, -9600, 9600),
+    ("egN_cutoff", FLOAT, -9600, 9600),
+    ("egN_cutoffN", FLOAT, -9600, 9600),
+    ("egN_cutoff_onccN", FLOAT, -9600, 9600),
+    ("egN_resonance", FLOAT, -40, 40),
+    ("egN_resonance_onccN", FLOAT, -40, 40),
+    ("egN_pan", FLOAT, -100, 100),
+    ("egN_pan_onccN", FLOAT, -100, 100),
+    ("egN_width", FLOAT, -100, 100),
+    ("egN_width_onccN", FLOAT, -100, 100),
+    ("egN_freq_lfoN", FLOAT, None, None),
+    ("egN_depth_lfoN", FLOAT, None, None),
+    # Flexible low frequency oscillators
+    ("lfoN_freq", FLOAT, -20, 20),
+    ("lfoN_freq_onccN", FLOAT, -20, 20),
+    ("lfoN_delay", FLOAT, 0, 100),
+    ("lfoN_delay_onccN", FLOAT, -100, 100),
+    ("lfoN_fade", FLOAT, 0, 100),
+    ("lfoN_fade_onccN", FLOAT, -100, 100),
+    ("lfoN_phase", FLOAT, 0, 1),
+    ("lfoN_phase_onccN", FLOAT, -1, 1),
+    ("lfoN_count", INTEGER, 0, None),
+    ("lfoN_wave", INTEGER, 0, None),
+    ("lfoN_waveN", INTEGER, 0, None),
+    ("lfoN_steps", INTEGER, 0, None),
+    ("lfoN_stepN", FLOAT, -100, 100),
+    ("lfoN_smooth", FLOAT, 0, None),
+    ("lfoN_offset", FLOAT, -1, 1),
+    ("lfoN_offsetN", FLOAT, -1, 1),
+    ("lfoN_ratio", FLOAT, 0, None),
+    ("lfoN_ratioN", FLOAT, 0, None),
+    ("lfoN_scale", FLOAT, 0, None),
+    ("lfoN_scaleN", FLOAT, 0, None),
+    ("lfoN_amplitude", FLOAT, -100, 100),
+    ("lfoN_amplitude_onccN", FLOAT, -100, 100),
+    ("lfoN_volume", FLOAT, -144, 48),
+    ("lfoN_volume_onccN", FLOAT, -144, 48),
+    ("lfoN_pitch", FLOAT, -9600, 9600),
+    ("lfoN_pitch_onccN", FLOAT, -9600, 9600),
+    ("lfoN_cutoff", FLOAT, -9600, 9600),
+    ("lfoN_cutoffN", FLOAT, -9600, 9600),
+    ("lfoN_cutoff_onccN", FLOAT, -9600, 9600),
+    ("lfoN_resonance", FLOAT, -40, 40),
+    ("lfoN_resonance_onccN", FLOAT, -40, 40),
+    ("lfoN_pan", FLOAT, -100, 100),
+    ("lfoN_pan_onccN", FLOAT, -100, 100),
+    ("lfoN_width", FLOAT, -100, 100),
+    ("lfoN_width_onccN", FLOAT, -100, 100),
+    ("lfoN_freq_lfoN", FLOAT, None, None),
+    ("lfoN_depth_lfoN", FLOAT, None, None),
+    # Curves and effects
+    ("curve_index", INTEGER, 0, 255),
+    ("vN", FLOAT, -1, 1),
+    ("amplitude_curveccN", INTEGER, 0, 255),
+    ("volume_curveccN", INTEGER, 0, 255),
+    ("pan_curveccN", INTEGER, 0, 255),
+    ("tune_curveccN", INTEGER, 0, 255, ("pitch_curveccN",)),
+    ("cutoff_curveccN", INTEGER, 0, 255),
+    ("effectN", FLOAT, 0, 100),
+    ("type", STRING, None, None),
+    ("bus", STRING, None, None),
+]
+
+OPCODE_TABLE += (
+    create_envelope_opcodes("ampeg")
+    + create_envelope_opcodes("pitcheg", (-12000, 12000))
+    + create_envelope_opcodes("fileg", (-12000, 12000))
+    + create_lfo_opcodes("amplfo", (-10, 10))
+    + create_lfo_opcodes("pitchlfo", (-1200, 1200))
+    + create_lfo_opcodes("fillfo", (-1200, 1200))
+)
+
+
+def create_opcode_database(opcode_table):
+    """
+    Returns a dict of every opcode name and alias to its Opcode.
+    """
+    opcode_database = {}
+    for row in opcode_table:
+        aliases = row[4] if len(row) > 4 else ()
+        opcode = Opcode(*row[:4], level=row[5] if len(row) > 5 else None)
+        opcode_database[opcode.name] = opcode
+        for alias in aliases:
+            opcode_database[intern(alias)] = opcode
+    return opcode_database
+
+
+OPCODE_DATABASE = create_opcode_database(OPCODE_TABLE)
+
+
+@lru_cache(maxsize=None)
+def lookup_opcode(name):
+    """
+    Returns (canonical name, Opcode) for an opcode name or alias, or (name, None) if unknown.
+    Numbered opcodes such as locc64 match their loccN entry and keep their numbers.
+    """
+    opcode = OPCODE_DATABASE.get(name)
+    if opcode is not None:
+        return opcode.name, opcode
+    numbers = NUMBER_REGEX.findall(name)
+    if numbers:
+        opcode = OPCODE_DATABASE.get(NUMBER_REGEX.sub(PLACEHOLDER, name))
+        if opcode is not None:
+            canonical_name = opcode.name.replace(PLACEHOLDER, "{}").format(*numbers)
+            return intern(canonical_name), opcode
+    return name, None
+
+
+def get_level_opcodes(level):
+    return frozenset(
+        opcode.name for opcode in OPCODE_DATABASE.values() if opcode.level == level
+    )
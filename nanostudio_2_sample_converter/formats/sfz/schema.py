@@ -26,13 +26,6 @@ KEY_OPCODES = [KEY, LO_KEY, HI_KEY, PITCH_KEYCENTER]
 TRANSPOSE_OPCODES = [TRANSPOSE, NOTE_OFFSET, OCTAVE_OFFSET]
 SAMPLE_EDIT_OPCODES = [OFFSET, END, LOOP_START, LOOP_END]
 
-RENAME_OPCODE_ALIASES = {
-    "loopmode": LOOP_MODE,
-    "loopstart": LOOP_START,
-    "loopend": LOOP_END,
-    "pitch": "tune",
-}
-
 REGION = {
     "header": "region",
     "obsidian_tag": SAMPLER_ZONE["tag"],
@@ -55,26 +48,6 @@ REGION = {
         LOOP_START,
         LOOP_END,
     ],
-    "opcodes": [
-        KEY,
-        LO_KEY,
-        HI_KEY,
-        TRANSPOSE,
-        DEFAULT_PATH,
-        "direction",
-        OFFSET,
-        END,
-        LOOP_MODE,
-        LOOP_START,
-        LOOP_END,
-        "loopmode",
-        "loopstart",
-        "loopend",
-        SAMPLE,
-        PITCH_KEYCENTER,
-        OCTAVE_OFFSET,
-        NOTE_OFFSET,
-    ],
 }
 
 GROUP = {
@@ -85,12 +58,10 @@ GROUP = {
         LO_VEL,
         HI_VEL,
     ],
-    "opcodes": [LO_VEL, HI_VEL, "tune", "pitch"],
 }
 
 GLOBAL = {
     "header": "global",
-    "opcodes": [],
     "obsidian_tag": OSCILLATOR_GROUP["tag"],
     "obsidian_opcode_rename": {},
     "obsidian_opcode_remove": [],
@@ -98,7 +69,6 @@ GLOBAL = {
 
 CONTROL = {
     "header": "control",
-    "opcodes": [],
     "obsidian_tag": VOICE["tag"],
     "obsidian_opcode_rename": {},
     "obsidian_opcode_remove": [],
@@ -108,8 +78,3 @@ SFZ = [REGION, GROUP, GLOBAL, CONTROL]
 HEADER = "header"
 
 HEADERS = [header[HEADER] for header in SFZ]
-HEADERS_XPATH = [
-    ".//" + "/".join(HEADERS[::-1][1 : index + 2]) for index in range(len(HEADERS) - 1)
-][::-1]
-
-OPCODES = REGION["opcodes"] + GROUP["opcodes"] + GLOBAL["opcodes"] + CONTROL["opcodes"]
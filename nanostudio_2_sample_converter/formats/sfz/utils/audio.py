@@ -1,11 +1,8 @@
-# pylint: disable=protected-access
-from pydub.audio_segment import AudioSegment
+from struct import pack, unpack_from
 from nanostudio_2_sample_converter.formats.sfz.utils.wave_chunk_parser_extended.chunks_extended import (
     RiffChunkExtended,
     SampleChunk,
-)
-from nanostudio_2_sample_converter.formats.sfz.exceptions import (
-    FfmpegNotInstalledException,
+    LENGTH_CHUNK_HEADER,
 )
 
 MANUFACTURER_ID = 0
@@ -14,45 +11,42 @@ MIDI_UNITY_NOTE = 60
 MIDI_PITCH_FRACTION = 0
 SMPTE_FORMAT = 0
 SMPTE_OFFSET = 0
-NUMBER_OF_SAMPLE_LOOPS = 1
-SAMPLER_DATA = 0
 CUE_POINT_ID = 0
 LOOP_TYPE = 0
 LOOP_FRACTION = 0
 LOOP_PLAY_COUNT = 0
+OFFSET_SAMPLE_RATE = 4
+OFFSET_BLOCK_ALIGN = 12
+PAD_BYTE = b"\x00"
 
 
-class Audio:
-    def __init__(self, path):
-        self.path = path
-        self.format = path.split(".")[-1]
-        try:
-            self.audio = AudioSegment.from_file(path, self.format)
-        except FileNotFoundError as exception:
-            if exception.filename == "ffprobe":
-                raise FfmpegNotInstalledException(
-                    "ffmpeg or libav is required to read audio from non-wave files. "
-                    "Please download and install from ffmpeg.org or libav.org then try again."
-                ) from exception
-        self.sample_rate = self.audio.frame_rate
+def get_sample_rate(format_chunk):
+    (sample_rate,) = unpack_from(
+        "<I", format_chunk, LENGTH_CHUNK_HEADER + OFFSET_SAMPLE_RATE
+    )
+    return sample_rate
 
-    def crop_audio(self, start=0, end=None):
-        samples = self.audio.get_array_of_samples()
-        samples = samples[start:end]
-        self.audio = self.audio._spawn(samples)
 
-    def export(self, destination):
-        destination_format = destination.split(".")[-1]
-        self.audio.export(destination, format=destination_format)
+def crop_wav_data(riff_index, start=None, end=None):
+    """
+    Returns the format chunk and a view of the frames from start up to end of an indexed wav.
+    Start and end are frame indexes, so all channels of a frame are always kept together.
+    Only the format chunk is read, the frames are a view of the lazily mapped data chunk.
+    """
+    format_chunk = riff_index.read_raw(RiffChunkExtended.CHUNK_FORMAT)
+    (block_align,) = unpack_from(
+        "<H", format_chunk, LENGTH_CHUNK_HEADER + OFFSET_BLOCK_ALIGN
+    )
+    with riff_index.data_view() as frames:
+        frame_count = len(frames) // block_align
+        start = min(max(start or 0, 0), frame_count)
+        end = frame_count if end is None else min(max(end, start), frame_count)
+        return format_chunk, frames[start * block_align : end * block_align]
 
 
-def add_loop_to_audio_data(file, loop_start, loop_end):
-    riff_chunk = RiffChunkExtended.from_file(file)
-    format_chunk = riff_chunk.sub_chunks[RiffChunkExtended.CHUNK_FORMAT]
-    data_chunk = riff_chunk.sub_chunks[RiffChunkExtended.CHUNK_DATA]
-    sample_rate = format_chunk.sample_rate
+def create_sample_chunk(sample_rate, loop_start, loop_end):
     sample_period = int((1 / sample_rate) * 1000000000)
-    sample_chunk = SampleChunk(
+    return SampleChunk(
         MANUFACTURER_ID,
         PRODUCT_ID,
         sample_period,
@@ -60,8 +54,6 @@ def add_loop_to_audio_data(file, loop_start, loop_end):
         MIDI_PITCH_FRACTION,
         SMPTE_FORMAT,
         SMPTE_OFFSET,
-        NUMBER_OF_SAMPLE_LOOPS,
-        SAMPLER_DATA,
         CUE_POINT_ID,
         LOOP_TYPE,
         loop_start,
@@ -69,20 +61,60 @@ def add_loop_to_audio_data(file, loop_start, loop_end):
         LOOP_FRACTION,
         LOOP_PLAY_COUNT,
     )
-    chunks = {
-        RiffChunkExtended.CHUNK_FORMAT: format_chunk,
-        RiffChunkExtended.CHUNK_DATA: data_chunk,
-        RiffChunkExtended.CHUNK_SAMPLE: sample_chunk,
-    }
-    return RiffChunkExtended(chunks).to_bytes()
 
 
-def check_if_audio_has_loops(file):
-    riff_chunk = RiffChunkExtended.from_file(file)
-    sample_chunk = riff_chunk.sub_chunks[RiffChunkExtended.CHUNK_SAMPLE]
-    return sample_chunk.first_loop_end != sample_chunk.first_loop_start
+def build_wav_data(format_chunk, frames, sample_chunk=None):
+    """
+    Returns the buffers of a wav file made of a format chunk, a data chunk holding the frames
+    and an optional sample chunk. The buffers are meant to be written without joining them.
+    """
+    buffers = [
+        format_chunk,
+        pack("<4sI", RiffChunkExtended.CHUNK_DATA, len(frames)),
+        frames,
+    ]
+    if len(frames) & 1:
+        buffers.append(PAD_BYTE)
+    if sample_chunk is not None:
+        buffers.append(sample_chunk.to_bytes())
+    riff_header = pack(
+        "<4sI4s",
+        RiffChunkExtended.HEADER_RIFF,
+        len(RiffChunkExtended.HEADER_WAVE) + sum(len(buffer) for buffer in buffers),
+        RiffChunkExtended.HEADER_WAVE,
+    )
+    return [riff_header] + buffers
+
+
+def add_loop_in_place(riff_index, loop_start, loop_end):
+    """
+    Writes the loop points into the sample chunk of an indexed wav opened for writing.
+    """
+    sample_chunk = create_sample_chunk(
+        get_sample_rate(riff_index.read_raw(RiffChunkExtended.CHUNK_FORMAT)),
+        loop_start,
+        loop_end,
+    )
+    riff_index.write_chunk(sample_chunk.to_bytes())
+
+
+def has_loops(riff_index):
+    """
+    Returns True if the sample chunk of an indexed wav has a first loop with a length.
+    Only the sample chunk is read, chunks without loops have no loop fields to read.
+    """
+    if RiffChunkExtended.CHUNK_SAMPLE not in riff_index:
+        return False
+    _, content_offset, _ = riff_index.chunks[RiffChunkExtended.CHUNK_SAMPLE]
+    sample_chunk = SampleChunk.from_file(
+        riff_index.file_handle, content_offset - LENGTH_CHUNK_HEADER
+    )
+    return (
+        sample_chunk.loop_count > 0
+        and sample_chunk.first_loop_end != sample_chunk.first_loop_start
+    )
 
 
-def write_audio_file(data, file_path):
+def write_audio_buffers(buffers, file_path):
     with open(file_path, "wb") as file:
-        file.write(data)
+        file.writelines(buffers)
@@ -0,0 +1,49 @@
+"""
+Decoded audio cache
+Stores the wav and re-encoded outputs of sample plans that go through ffmpeg, keyed by the
+source content hash and the edit, so unchanged samples are not decoded again on the next run.
+"""
+import os
+from nanostudio_2_sample_converter import __version__
+from nanostudio_2_sample_converter.utils.disk_cache import (
+    DiskCache,
+    DEFAULT_CACHE_DIRECTORY,
+    hash_file,
+    hash_key,
+)
+
+AUDIO_CACHE_FORMAT = "1"
+AUDIO_CACHE_DIRECTORY = os.path.join(DEFAULT_CACHE_DIRECTORY, "audio")
+AUDIO_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+
+class AudioCache:
+    def __init__(
+        self, directory=AUDIO_CACHE_DIRECTORY, max_bytes=AUDIO_CACHE_MAX_BYTES
+    ):
+        self.disk_cache = DiskCache(directory, max_bytes)
+
+    @staticmethod
+    def create_key(sample_plan):
+        return hash_key(
+            __version__,
+            AUDIO_CACHE_FORMAT,
+            sample_plan.source_hash or hash_file(sample_plan.source),
+            sample_plan.destination_format,
+            repr(tuple(sample_plan.edit)),
+        )
+
+    def load(self, key, destination):
+        """
+        Writes the cached output for a key to destination. Returns False on a miss.
+        """
+        return self.disk_cache.copy_to(key, destination)
+
+    def store(self, key, path):
+        """
+        Copies an output into the cache without evicting, call evict once all are stored.
+        """
+        self.disk_cache.put_file(key, path, evict=False)
+
+    def evict(self):
+        self.disk_cache.evict()
@@ -0,0 +1,175 @@
+"""
+Batched ffmpeg transcoding
+Several audio files are decoded, cropped and encoded by a single ffmpeg process, one input and
+one output mapping per file, so process start-up is paid once per batch instead of per file.
+Processes are run by an asyncio scheduler that bounds how many run at once, kills processes that
+run past a timeout and kills running processes when their task is cancelled.
+"""
+import asyncio
+from asyncio.subprocess import DEVNULL, PIPE
+from nanostudio_2_sample_converter.formats.sfz.exceptions import (
+    FfmpegDecodeException,
+    FfmpegNotInstalledException,
+    FfmpegTimeoutException,
+)
+
+FFMPEG = "ffmpeg"
+DEFAULT_BATCH_SIZE = 32
+WAV = "wav"
+WAV_CODEC = "pcm_s32le"
+WAV_CODECS = {8: "pcm_u8", 16: "pcm_s16le", 24: "pcm_s24le", 32: "pcm_s32le"}
+BITEXACT_ARGUMENTS = [
+    "-map_metadata",
+    "-1",
+    "-fflags",
+    "+bitexact",
+    "-flags:a",
+    "+bitexact",
+]
+
+
+class Transcode:
+    __slots__ = (
+        "source",
+        "destination",
+        "destination_format",
+        "trim",
+        "wav_codec",
+    )
+
+    def __init__(
+        self, source, destination, destination_format, trim=None, wav_codec=WAV_CODEC
+    ):
+        """
+        Args:
+            source (str): Path of the audio file to decode.
+            destination (str): Path the audio is written to.
+            destination_format (str): Format of the destination, e.g. wav or ogg.
+            trim (tuple): First frame to keep and frame to stop before, either can be None -
+                optional.
+            wav_codec (str): ffmpeg codec of wav destinations - optional.
+        """
+        self.source = source
+        self.destination = destination
+        self.destination_format = destination_format
+        self.trim = trim if trim is not None else (None, None)
+        self.wav_codec = wav_codec
+
+    def to_output_arguments(self, input_index):
+        arguments = ["-map", f"{input_index}:a:0"] + BITEXACT_ARGUMENTS
+        start, end = self.trim
+        if start or end:
+            trim = f"atrim=start_sample={start or 0}"
+            if end is not None:
+                trim += f":end_sample={end}"
+            arguments += ["-af", f"{trim},asetpts=PTS-STARTPTS"]
+        if self.destination_format == WAV:
+            arguments += ["-c:a", self.wav_codec]
+        return arguments + ["-f", self.destination_format, self.destination]
+
+
+def get_wav_codec(audio_info):
+    """
+    Returns the wav codec that keeps the sample size of a lossless integer source. Lossy and
+    floating point sources are decoded to 32 bit integer samples.
+    """
+    if audio_info.is_lossy or audio_info.is_float:
+        return WAV_CODEC
+    return WAV_CODECS.get(audio_info.bits_per_sample, WAV_CODEC)
+
+
+def create_batch_command(transcodes):
+    command = [FFMPEG, "-nostdin", "-hide_banner", "-loglevel", "error", "-y"]
+    for transcode in transcodes:
+        command += ["-i", transcode.source]
+    for input_index, transcode in enumerate(transcodes):
+        command += transcode.to_output_arguments(input_index)
+    return command
+
+
+def iter_batches(items, batch_size=DEFAULT_BATCH_SIZE):
+    for index in range(0, len(items), batch_size):
+        yield items[index : index + batch_size]
+
+
+async def gather_or_cancel(*awaitables):
+    """
+    Gathers awaitables concurrently. If one of them fails, the others are cancelled before the
+    exception is raised.
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def kill_process(process):
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+
+class FfmpegScheduler:
+    def __init__(self, max_processes=1, timeout=None):
+        """
+        Must be created in the event loop it is used in.
+        Args:
+            max_processes (int): Number of ffmpeg processes that run at once.
+            timeout (float): Seconds a single ffmpeg process may run before it is killed - optional.
+        """
+        self.semaphore = asyncio.Semaphore(max_processes)
+        self.timeout = timeout
+
+    async def __run_process(self, command):
+        """
+        Returns the exit code and error output of a process, or None if it timed out.
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command, stdin=DEVNULL, stdout=DEVNULL, stderr=PIPE
+            )
+        except FileNotFoundError as exception:
+            raise FfmpegNotInstalledException(
+                "ffmpeg is required to read audio from non-wave files. "
+                "Please download and install from ffmpeg.org then try again."
+            ) from exception
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            await kill_process(process)
+            return None
+        except asyncio.CancelledError:
+            await kill_process(process)
+            raise
+        return process.returncode, stderr
+
+    async def run_batch(self, transcodes):
+        """
+        Runs a batch of transcodes as one ffmpeg process. If the batch fails or times out, every
+        transcode is retried on its own so the file ffmpeg cannot convert is the one reported.
+        """
+        async with self.semaphore:
+            result = await self.__run_process(create_batch_command(transcodes))
+        if result is not None and result[0] == 0:
+            return
+        if len(transcodes) > 1:
+            await gather_or_cancel(
+                *(self.run_batch([transcode]) for transcode in transcodes)
+            )
+            return
+        if result is None:
+            raise FfmpegTimeoutException(
+                f"Error! ffmpeg did not convert {transcodes[0].source} "
+                f"within {self.timeout} seconds."
+            )
+        raise FfmpegDecodeException(
+            f"Error! ffmpeg could not convert {transcodes[0].source}: "
+            f"{result[1].decode(errors='replace').strip()}"
+        )
@@ -0,0 +1,108 @@
+"""
+Sfz IR cache
+Stores normalized sfz header trees on disk, keyed by the sfz content hash and converter version.
+Trees are encoded as nested tuples of opcode dicts with marshal and compressed with zlib.
+"""
+import marshal
+import os
+import sys
+import zlib
+from nanostudio_2_sample_converter import __version__
+from nanostudio_2_sample_converter.utils.disk_cache import (
+    DiskCache,
+    DEFAULT_CACHE_DIRECTORY,
+    hash_file,
+    hash_key,
+)
+from nanostudio_2_sample_converter.formats.sfz.headers import (
+    Control,
+    Global,
+    Group,
+    Region,
+)
+
+IR_CACHE_FORMAT = "2"
+IR_CACHE_DIRECTORY = os.path.join(DEFAULT_CACHE_DIRECTORY, "ir")
+IR_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def encode_headers(control):
+    return (
+        control.opcodes,
+        tuple(
+            (
+                global_header.opcodes,
+                tuple(
+                    (group.opcodes, tuple(region.opcodes for region in group.children))
+                    for group in global_header.children
+                ),
+            )
+            for global_header in control.children
+        ),
+    )
+
+
+def decode_headers(encoded_headers):
+    control_opcodes, encoded_globals = encoded_headers
+    return Control(
+        control_opcodes,
+        [
+            Global(
+                global_opcodes,
+                [
+                    Group(group_opcodes, [Region(opcodes) for opcodes in regions])
+                    for (group_opcodes, regions) in encoded_groups
+                ],
+            )
+            for (global_opcodes, encoded_groups) in encoded_globals
+        ],
+    )
+
+
+class IrCache:
+    def __init__(self, directory=IR_CACHE_DIRECTORY, max_bytes=IR_CACHE_MAX_BYTES):
+        self.disk_cache = DiskCache(directory, max_bytes)
+
+    @staticmethod
+    def create_key(sfz_file_path):
+        """
+        Includes are resolved relative to the sfz directory, so it is part of the key. Otherwise
+        two libraries with identical root sfz text but different included files would share
+        an entry.
+        """
+        with open(sfz_file_path, "rb") as reader:
+            sfz_bytes = reader.read()
+        return hash_key(
+            __version__,
+            IR_CACHE_FORMAT,
+            sys.implementation.cache_tag,
+            os.path.dirname(os.path.realpath(sfz_file_path)),
+            sfz_bytes,
+        )
+
+    def load(self, key):
+        """
+        Returns the cached header tree, or None on a miss or if an included file has changed.
+        """
+        value = self.disk_cache.get(key)
+        if value is None:
+            return None
+        try:
+            included_files, encoded_headers = marshal.loads(zlib.decompress(value))
+        except (zlib.error, EOFError, ValueError, TypeError):
+            return None
+        for include_path, include_hash in included_files:
+            if (
+                not os.path.isfile(include_path)
+                or hash_file(include_path) != include_hash
+            ):
+                return None
+        return decode_headers(encoded_headers)
+
+    def store(self, key, included_paths, sfz_headers):
+        included_files = tuple(
+            (include_path, hash_file(include_path))
+            for include_path in dict.fromkeys(included_paths)
+        )
+        value = marshal.dumps((included_files, encode_headers(sfz_headers)))
+        self.disk_cache.put(key, zlib.compress(value))
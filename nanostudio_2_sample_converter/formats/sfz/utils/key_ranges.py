@@ -0,0 +1,146 @@
+"""
+Sfz key range functions
+Interval index over the (lokey, hikey, pitch_keycenter) ranges of a velocity layer, used to reduce
+a layer to the NanoStudio 2 zone limit while keeping the whole keyboard covered.
+"""
+from bisect import bisect_left, bisect_right
+from heapq import heapify, heappop, heappush
+from nanostudio_2_sample_converter.formats.sfz.schema import (
+    LO_KEY,
+    HI_KEY,
+    PITCH_KEYCENTER,
+)
+
+MIN_KEY = 0
+MAX_KEY = 127
+
+
+def get_key_range(region):
+    """
+    Returns (lokey, hikey, root) for a region, using the sfz defaults for missing opcodes.
+    The root falls back to the middle of the key range when pitch_keycenter is not set.
+    """
+    lokey = region.get_opcode(LO_KEY, MIN_KEY)
+    hikey = region.get_opcode(HI_KEY, MAX_KEY)
+    root = region.get_opcode(PITCH_KEYCENTER, (lokey + hikey) // 2)
+    return lokey, hikey, root
+
+
+class KeyRangeIndex:
+    __slots__ = ("regions", "ranges", "positions")
+
+    def __init__(self, regions):
+        """
+        Args:
+            regions (list): Regions of a single velocity layer, in document order.
+        """
+        ranges = [get_key_range(region) for region in regions]
+        order = sorted(
+            range(len(regions)),
+            key=lambda index: (ranges[index][2], ranges[index][0], ranges[index][1]),
+        )
+        self.regions = [regions[index] for index in order]
+        self.ranges = [list(ranges[index]) for index in order]
+        self.positions = order
+
+    def __select_with_max_gap(self, roots, max_gap):
+        indices = [0]
+        while indices[-1] < len(roots) - 1:
+            indices.append(bisect_right(roots, roots[indices[-1]] + max_gap) - 1)
+        return indices
+
+    @staticmethod
+    def __split_widest_gaps(roots, indices, max_zones):
+        selected = set(indices)
+        heap = [
+            (roots[previous] - roots[following], previous, following)
+            for (previous, following) in zip(indices, indices[1:])
+        ]
+        heapify(heap)
+        while len(selected) < max_zones and heap:
+            _, previous, following = heappop(heap)
+            if following - previous < 2:
+                continue
+            middle = (roots[previous] + roots[following]) / 2
+            index = min(
+                bisect_left(roots, middle, previous + 1, following), following - 1
+            )
+            if (
+                index > previous + 1
+                and middle - roots[index - 1] <= roots[index] - middle
+            ):
+                index -= 1
+            selected.add(index)
+            heappush(heap, (roots[previous] - roots[index], previous, index))
+            heappush(heap, (roots[index] - roots[following], index, following))
+        return sorted(selected)
+
+    def select(self, max_zones):
+        """
+        Returns the sorted indices of the max_zones zones that best cover the keyboard.
+        The lowest and highest zones are always kept. A binary search finds the smallest gap
+        between neighbouring roots that fits in max_zones, then any zones left over split the
+        widest remaining gaps. Runs in O(n log n).
+        """
+        count = len(self.regions)
+        if count <= max_zones:
+            return list(range(count))
+        if max_zones < 2:
+            return [0][:max_zones]
+        roots = [key_range[2] for key_range in self.ranges]
+        low_gap = max(
+            following - previous for (previous, following) in zip(roots, roots[1:])
+        )
+        high_gap = roots[-1] - roots[0]
+        while low_gap < high_gap:
+            max_gap = (low_gap + high_gap) // 2
+            if len(self.__select_with_max_gap(roots, max_gap)) <= max_zones:
+                high_gap = max_gap
+            else:
+                low_gap = max_gap + 1
+        indices = self.__select_with_max_gap(roots, low_gap)
+        return self.__split_widest_gaps(roots, indices, max_zones)
+
+    def __set_key_range(self, index, lokey, hikey):
+        key_range = self.ranges[index]
+        key_range[0], key_range[1] = lokey, hikey
+        self.regions[index].opcodes[LO_KEY] = lokey
+        self.regions[index].opcodes[HI_KEY] = hikey
+
+    def fill_holes(self, indices):
+        """
+        Widens the selected zones so they cover every key the full layer covered.
+        Gaps between neighbouring zones are split halfway between their roots.
+        """
+        if not indices:
+            return
+        lowest_key = min(key_range[0] for key_range in self.ranges)
+        highest_key = max(key_range[1] for key_range in self.ranges)
+        first = indices[0]
+        if self.ranges[first][0] > lowest_key:
+            self.__set_key_range(first, lowest_key, self.ranges[first][1])
+        covering = first
+        for index in indices[1:]:
+            covered_to = self.ranges[covering][1]
+            lokey, hikey, root = self.ranges[index]
+            if covered_to + 1 < lokey:
+                split = (self.ranges[covering][2] + root) // 2
+                split = min(max(split, covered_to), lokey - 1)
+                self.__set_key_range(covering, self.ranges[covering][0], split)
+                self.__set_key_range(index, split + 1, hikey)
+            if self.ranges[index][1] >= self.ranges[covering][1]:
+                covering = index
+        if self.ranges[covering][1] < highest_key:
+            self.__set_key_range(covering, self.ranges[covering][0], highest_key)
+
+    def reduce(self, max_zones):
+        """
+        Returns at most max_zones regions in document order, widened so there are no holes.
+        """
+        indices = self.select(max_zones)
+        if len(indices) < len(self.regions):
+            self.fill_holes(indices)
+        return [
+            self.regions[index]
+            for index in sorted(indices, key=self.positions.__getitem__)
+        ]
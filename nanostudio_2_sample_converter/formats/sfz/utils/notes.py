@@ -0,0 +1,42 @@
+"""
+Sfz note name functions
+Lookup table of every valid key opcode value, built once at import time.
+Note: uses the standard MIDI octave numbering, c-1 = 0, c4 = 60 and g9 = 127.
+"""
+from nanostudio_2_sample_converter.formats.sfz.exceptions import SfzInvalidKeyException
+
+MIN_KEY = 0
+MAX_KEY = 127
+
+NOTE_OFFSETS = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11}
+ACCIDENTAL_OFFSETS = {"": 0, "#": 1, "b": -1}
+
+
+def create_key_numbers():
+    key_numbers = {
+        str(key_number): key_number for key_number in range(MIN_KEY, MAX_KEY + 1)
+    }
+    for octave in range(-1, 10):
+        for note, note_offset in NOTE_OFFSETS.items():
+            for accidental, accidental_offset in ACCIDENTAL_OFFSETS.items():
+                key_number = (octave + 1) * 12 + note_offset + accidental_offset
+                if MIN_KEY <= key_number <= MAX_KEY:
+                    key_numbers[f"{note}{accidental}{octave}"] = key_number
+    return key_numbers
+
+
+KEY_NUMBERS = create_key_numbers()
+
+
+def convert_key_string_to_key_number(string):
+    """
+    Returns the MIDI key number for a key opcode value, either a number (60) or a note name
+    in any case (c4, C#4, db4).
+    """
+    try:
+        return KEY_NUMBERS[string.lower()]
+    except KeyError:
+        raise SfzInvalidKeyException(
+            f"Invalid key '{string}'. Expected a MIDI key number from {MIN_KEY} to {MAX_KEY} "
+            "or a note name from c-1 to g9."
+        ) from None
@@ -0,0 +1,134 @@
+"""
+Sfz normalization pass manager
+Each pass declares the opcodes it reads and writes. Consecutive header-local passes are fused
+into a single traversal of the header tree whenever the declarations show it is safe.
+"""
+from time import perf_counter
+from nanostudio_2_sample_converter.formats.sfz.headers import Header
+
+HEADER_SCOPE = (Header,)
+TREE_SCOPE = "tree"
+
+ALL_OPCODES = "*"
+STRUCTURE = "<structure>"
+
+
+class Pass:
+    __slots__ = ("name", "function", "reads", "writes", "scope")
+
+    def __init__(self, name, function, reads=(), writes=(), scope=TREE_SCOPE):
+        """
+        Args:
+            name (str): Name used when reporting timings.
+            function (callable): Called with a single header for header-local passes,
+                or with the root control header for TREE_SCOPE passes.
+            reads (iterable): Opcodes the pass reads. ALL_OPCODES and STRUCTURE are wildcards.
+            writes (iterable): Opcodes the pass writes. ALL_OPCODES and STRUCTURE are wildcards.
+            scope (str or tuple): TREE_SCOPE, or the header classes a header-local pass is
+                applied to if it only touches the header it is called with. HEADER_SCOPE
+                applies it to every header.
+        """
+        self.name = name
+        self.function = function
+        self.reads = frozenset(reads)
+        self.writes = frozenset(writes)
+        self.scope = scope
+
+    @property
+    def is_header_local(self):
+        return self.scope != TREE_SCOPE
+
+    @staticmethod
+    def __is_intersecting(opcodes_1, opcodes_2):
+        if not opcodes_1 or not opcodes_2:
+            return False
+        if ALL_OPCODES in opcodes_1 or ALL_OPCODES in opcodes_2:
+            return True
+        return not opcodes_1.isdisjoint(opcodes_2)
+
+    def is_independent_of(self, other):
+        return not (
+            self.__is_intersecting(self.reads, other.writes)
+            or self.__is_intersecting(self.writes, other.reads)
+            or self.__is_intersecting(self.writes, other.writes)
+        )
+
+
+class PassManager:
+    def __init__(self, passes):
+        self.passes = passes
+        self.stages = self.fuse(passes)
+        self.timings = []
+
+    @staticmethod
+    def fuse(passes):
+        """
+        Groups passes into stages. A header-local pass joins the most recent header-local stage
+        when it is independent of every tree pass scheduled after that stage. A tree pass that
+        writes STRUCTURE changes which headers a header-local pass visits, so passes are never
+        moved ahead of one.
+        """
+        stages = []
+        for sfz_pass in passes:
+            if sfz_pass.is_header_local:
+                for stage in reversed(stages):
+                    if stage[0].is_header_local:
+                        stage.append(sfz_pass)
+                        break
+                    if STRUCTURE in stage[0].writes or not sfz_pass.is_independent_of(
+                        stage[0]
+                    ):
+                        stages.append([sfz_pass])
+                        break
+                else:
+                    stages.append([sfz_pass])
+            else:
+                stages.append([sfz_pass])
+        return stages
+
+    @staticmethod
+    def __run_header_stage(stage, sfz_headers):
+        for header in list(sfz_headers.iter()):
+            for sfz_pass in stage:
+                if isinstance(header, sfz_pass.scope):
+                    sfz_pass.function(header)
+
+    def run(self, sfz_headers):
+        """
+        Runs every stage and records how long each stage took. Fused passes share the timing
+        of their stage, so no per header call is timed.
+        """
+        self.timings = []
+        for stage in self.stages:
+            start = perf_counter()
+            if stage[0].is_header_local:
+                self.__run_header_stage(stage, sfz_headers)
+            else:
+                stage[0].function(sfz_headers)
+            self.timings.append(perf_counter() - start)
+        return sfz_headers
+
+    def report(self):
+        """
+        Returns the stage timings of the last run, on the line of the first pass of each
+        stage. Stages that did not run, e.g. because the normalized headers came from the IR
+        cache, are marked as cached.
+        """
+        lines = []
+        for stage_index, stage in enumerate(self.stages):
+            timing = self.timings[stage_index] if self.timings else None
+            lines.append(
+                f"{stage_index:>2} {stage[0].name:<45} " + self.__format_timing(timing)
+            )
+            for sfz_pass in stage[1:]:
+                lines.append(f"{stage_index:>2} {sfz_pass.name:<45}")
+        total = sum(self.timings) if self.timings else None
+        lines.append(f"{len(self.stages)} stages, {len(self.passes)} passes")
+        lines.append(f"   {'total':<45} " + self.__format_timing(total))
+        return "\n".join(lines)
+
+    @staticmethod
+    def __format_timing(timing):
+        if timing is None:
+            return f"{'cached':>13}"
+        return f"{timing * 1000:10.3f} ms"
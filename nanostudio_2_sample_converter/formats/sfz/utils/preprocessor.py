@@ -0,0 +1,98 @@
+"""
+Sfz preprocessor
+Expands #include directives and substitutes #define $variables in the sfz token stream.
+Included files are tokenized once per path and modification time, the most recently used
+INCLUDE_CACHE_SIZE of them are kept.
+"""
+import os
+import re
+from functools import lru_cache
+from nanostudio_2_sample_converter.formats.sfz.exceptions import (
+    SfzIncludeDoesNotExistException,
+    SfzRecursiveIncludeException,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.tokenizer import (
+    tokenize_file,
+    INCLUDE_TOKEN,
+    DEFINE_TOKEN,
+)
+
+VARIABLE_REGEX = re.compile(r"\$\w+")
+
+INCLUDE_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=INCLUDE_CACHE_SIZE)
+def tokenize_include_version(include_path, modified_time):
+    # pylint: disable=unused-argument
+    # The modification time is only part of the cache key.
+    return tuple(tokenize_file(include_path))
+
+
+def tokenize_include(include_path):
+    """
+    Returns the tokens of an included file, reusing them until the file is modified.
+    """
+    return tokenize_include_version(include_path, os.stat(include_path).st_mtime_ns)
+
+
+def substitute_variables(string, defines):
+    if not defines or "$" not in string:
+        return string
+    return VARIABLE_REGEX.sub(
+        lambda match: defines.get(match.group(0), match.group(0)), string
+    )
+
+
+def resolve_include_path(include, sfz_directory):
+    include_path = os.path.realpath(
+        os.path.join(sfz_directory, include.replace("\\", "/"))
+    )
+    if not os.path.isfile(include_path):
+        raise SfzIncludeDoesNotExistException(f"{include_path} does not exist.")
+    return include_path
+
+
+def preprocess(
+    sfz_tokens, sfz_directory, defines=None, include_stack=(), included_paths=None
+):
+    """
+    Yields the sfz tokens with includes expanded and $variables substituted.
+    Include paths are relative to sfz_directory, the directory of the root sfz file.
+    Defines apply to every token after them, including those of later included files.
+    The path of every included file is appended to included_paths if it is given.
+    """
+    defines = {} if defines is None else defines
+    for token_type, name, value in sfz_tokens:
+        if token_type == DEFINE_TOKEN:
+            defines[name] = substitute_variables(value, defines)
+        elif token_type == INCLUDE_TOKEN:
+            include_path = resolve_include_path(
+                substitute_variables(name, defines), sfz_directory
+            )
+            if include_path in include_stack:
+                raise SfzRecursiveIncludeException(f"{include_path} includes itself.")
+            if included_paths is not None:
+                included_paths.append(include_path)
+            yield from preprocess(
+                tokenize_include(include_path),
+                sfz_directory,
+                defines,
+                include_stack + (include_path,),
+                included_paths,
+            )
+        elif value is None:
+            yield token_type, name, value
+        else:
+            name = substitute_variables(name, defines)
+            yield token_type, name, substitute_variables(value, defines)
+
+
+def preprocess_file(sfz_file_path, included_paths=None):
+    sfz_directory = os.path.dirname(os.path.realpath(sfz_file_path))
+    yield from preprocess(
+        tokenize_file(sfz_file_path),
+        sfz_directory,
+        include_stack=(os.path.realpath(sfz_file_path),),
+        included_paths=included_paths,
+    )
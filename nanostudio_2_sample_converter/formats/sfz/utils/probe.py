@@ -0,0 +1,243 @@
+"""
+Audio header probing
+Reads the sample rate, channel count, sample size and length of WAV, AIFF, FLAC and Ogg
+(Vorbis and Opus) files straight from their headers, without decoding audio or starting ffprobe.
+Note: header layouts taken from the RIFF, AIFF-C, FLAC, Vorbis I and RFC 7845 specifications
+"""
+from struct import error as StructError, unpack, unpack_from
+from typing import NamedTuple
+from wave_chunk_parser.exceptions import InvalidHeaderException
+from nanostudio_2_sample_converter.formats.sfz.exceptions import AudioProbeException
+from nanostudio_2_sample_converter.formats.sfz.utils.wave_chunk_parser_extended.chunks_extended import (
+    RiffChunkIndex,
+)
+
+WAV = "wav"
+AIFF = "aiff"
+FLAC = "flac"
+OGG = "ogg"
+
+LENGTH_SNIFF = 12
+LENGTH_ID3_HEADER = 10
+LENGTH_FLAC_BLOCK_HEADER = 4
+LENGTH_FLAC_STREAMINFO = 34
+LENGTH_OGG_PAGE_HEADER = 27
+LENGTH_OGG_TAIL = 65536
+LENGTH_AIFF_CHUNK_HEADER = 8
+LENGTH_AIFF_COMM = 18
+
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+OFFSET_WAVE_SUB_FORMAT = 24
+WAVE_PCM_FORMATS = (1, WAVE_FORMAT_IEEE_FLOAT)
+AIFC_PCM_COMPRESSIONS = (b"NONE", b"twos", b"sowt", b"raw ", b"in24", b"in32")
+AIFC_FLOAT_COMPRESSIONS = (b"fl32", b"FL32", b"fl64", b"FL64")
+FLAC_STREAMINFO = 0
+OPUS_SAMPLE_RATE = 48000
+
+
+class AudioInfo(NamedTuple):
+    """
+    Header fields of an audio file. bits_per_sample is None for lossy formats and frame_count
+    is None if the header does not store it.
+    """
+
+    format: str
+    sample_rate: int
+    channels: int
+    bits_per_sample: int = None
+    frame_count: int = None
+    is_float: bool = False
+
+    @property
+    def is_lossy(self):
+        return self.bits_per_sample is None
+
+    @property
+    def duration(self):
+        if self.frame_count is None or not self.sample_rate:
+            return None
+        return self.frame_count / self.sample_rate
+
+
+def read_at(file_handle, offset, length):
+    """
+    Reads up to length bytes at an offset, truncated headers are left to the caller to check.
+    """
+    if length <= 0:
+        return b""
+    file_handle.seek(offset)
+    return file_handle.read(length)
+
+
+def read_extended(data):
+    """
+    Converts an 80 bit IEEE 754 extended precision number, as used for AIFF sample rates.
+    """
+    exponent, mantissa = unpack(">HQ", data)
+    sign = -1 if exponent & 0x8000 else 1
+    exponent &= 0x7FFF
+    if exponent == 0 and mantissa == 0:
+        return 0
+    return sign * mantissa * 2.0 ** (exponent - 16383 - 63)
+
+
+def probe_wav(file_handle):
+    try:
+        with RiffChunkIndex(file_handle) as riff_index:
+            if b"fmt " not in riff_index:
+                raise AudioProbeException("WAVE file has no fmt chunk.")
+            format_data = riff_index.read(b"fmt ")
+            data_length = riff_index.chunks[b"data"][2] if b"data" in riff_index else 0
+    except InvalidHeaderException as exception:
+        raise AudioProbeException(str(exception)) from exception
+    format_tag, channels, sample_rate, _, block_align, bits_per_sample = unpack_from(
+        "<HHIIHH", format_data
+    )
+    if format_tag == WAVE_FORMAT_EXTENSIBLE and len(format_data) >= 26:
+        (format_tag,) = unpack_from("<H", format_data, OFFSET_WAVE_SUB_FORMAT)
+    if format_tag not in WAVE_PCM_FORMATS:
+        return AudioInfo(WAV, sample_rate, channels)
+    return AudioInfo(
+        WAV,
+        sample_rate,
+        channels,
+        bits_per_sample,
+        data_length // block_align if block_align else None,
+        format_tag == WAVE_FORMAT_IEEE_FLOAT,
+    )
+
+
+def probe_aiff(file_handle):
+    form, form_length, form_type = unpack(">4sI4s", read_at(file_handle, 0, 12))
+    offset = LENGTH_SNIFF
+    end_of_form = form_length + LENGTH_AIFF_CHUNK_HEADER
+    while offset + LENGTH_AIFF_CHUNK_HEADER <= end_of_form:
+        header = read_at(file_handle, offset, LENGTH_AIFF_CHUNK_HEADER)
+        if len(header) < LENGTH_AIFF_CHUNK_HEADER:
+            break
+        chunk_id, chunk_length = unpack(">4sI", header)
+        if chunk_id == b"COMM":
+            data = read_at(file_handle, offset + LENGTH_AIFF_CHUNK_HEADER, chunk_length)
+            channels, frame_count, bits_per_sample = unpack_from(">hIh", data)
+            sample_rate = round(read_extended(data[8:LENGTH_AIFF_COMM]))
+            compression = data[LENGTH_AIFF_COMM : LENGTH_AIFF_COMM + 4]
+            if form_type == b"AIFC" and compression not in AIFC_PCM_COMPRESSIONS:
+                if compression not in AIFC_FLOAT_COMPRESSIONS:
+                    return AudioInfo(AIFF, sample_rate, channels, None, frame_count)
+                return AudioInfo(
+                    AIFF,
+                    sample_rate,
+                    channels,
+                    64 if compression.lower() == b"fl64" else 32,
+                    frame_count,
+                    True,
+                )
+            return AudioInfo(AIFF, sample_rate, channels, bits_per_sample, frame_count)
+        # Chunks are word aligned, odd length chunks are followed by a pad byte
+        offset += LENGTH_AIFF_CHUNK_HEADER + chunk_length + (chunk_length & 1)
+    raise AudioProbeException(f"{form.decode()} file has no COMM chunk.")
+
+
+def skip_id3(file_handle):
+    """
+    Returns the offset after an ID3v2 tag, or 0 if the file does not start with one.
+    """
+    header = read_at(file_handle, 0, LENGTH_ID3_HEADER)
+    if len(header) < LENGTH_ID3_HEADER or header[:3] != b"ID3":
+        return 0
+    # The tag length is stored as four 7 bit bytes
+    length = 0
+    for byte in header[6:10]:
+        length = (length << 7) | (byte & 0x7F)
+    return LENGTH_ID3_HEADER + length
+
+
+def probe_flac(file_handle, offset=0):
+    header = read_at(
+        file_handle, offset + 4, LENGTH_FLAC_BLOCK_HEADER + LENGTH_FLAC_STREAMINFO
+    )
+    if len(header) < LENGTH_FLAC_BLOCK_HEADER + LENGTH_FLAC_STREAMINFO or (
+        header[0] & 0x7F != FLAC_STREAMINFO
+    ):
+        raise AudioProbeException("FLAC file does not start with a STREAMINFO block.")
+    # Sample rate (20 bits), channels - 1 (3 bits), bits per sample - 1 (5 bits) and
+    # total samples (36 bits) are packed after the block and frame sizes.
+    (fields,) = unpack_from(">Q", header, LENGTH_FLAC_BLOCK_HEADER + 10)
+    frame_count = fields & 0xFFFFFFFFF
+    return AudioInfo(
+        FLAC,
+        fields >> 44,
+        ((fields >> 41) & 0x7) + 1,
+        ((fields >> 36) & 0x1F) + 1,
+        frame_count or None,
+    )
+
+
+def read_last_granule_position(file_handle, serial_number):
+    """
+    Returns the granule position of the last Ogg page of a logical stream, which is its length
+    in samples. Only the tail of the file is read.
+    """
+    file_handle.seek(0, 2)
+    file_length = file_handle.tell()
+    offset = max(file_length - LENGTH_OGG_TAIL, 0)
+    tail = read_at(file_handle, offset, file_length - offset)
+    index = tail.rfind(b"OggS")
+    while index != -1:
+        if index + LENGTH_OGG_PAGE_HEADER <= len(tail):
+            granule_position, page_serial_number = unpack_from("<qI", tail, index + 6)
+            if page_serial_number == serial_number and granule_position >= 0:
+                return granule_position
+        index = tail.rfind(b"OggS", 0, index)
+    return None
+
+
+def probe_ogg(file_handle):
+    page_header = read_at(file_handle, 0, LENGTH_OGG_PAGE_HEADER)
+    if len(page_header) < LENGTH_OGG_PAGE_HEADER:
+        raise AudioProbeException("Ogg file has no page header.")
+    (serial_number,) = unpack_from("<I", page_header, 14)
+    segment_count = page_header[26]
+    segments = read_at(file_handle, LENGTH_OGG_PAGE_HEADER, segment_count)
+    packet = read_at(file_handle, LENGTH_OGG_PAGE_HEADER + segment_count, sum(segments))
+    if packet[:7] == b"\x01vorbis" and len(packet) >= 16:
+        channels, sample_rate = unpack_from("<BI", packet, 11)
+        frame_count = read_last_granule_position(file_handle, serial_number)
+        return AudioInfo(OGG, sample_rate, channels, None, frame_count)
+    if packet[:8] == b"OpusHead" and len(packet) >= 12:
+        channels, pre_skip = unpack_from("<BH", packet, 9)
+        frame_count = read_last_granule_position(file_handle, serial_number)
+        if frame_count is not None:
+            frame_count = max(frame_count - pre_skip, 0)
+        return AudioInfo(OGG, OPUS_SAMPLE_RATE, channels, None, frame_count)
+    raise AudioProbeException("Ogg file does not contain a Vorbis or Opus stream.")
+
+
+def probe_file(file_handle):
+    """
+    Returns the AudioInfo of a seekable binary file. The format is detected from the first
+    bytes of the file, not from its name.
+    """
+    try:
+        magic = read_at(file_handle, 0, LENGTH_SNIFF)
+        if magic[:4] == b"RIFF" and magic[8:12] == b"WAVE":
+            return probe_wav(file_handle)
+        if magic[:4] == b"FORM" and magic[8:12] in (b"AIFF", b"AIFC"):
+            return probe_aiff(file_handle)
+        if magic[:4] == b"OggS":
+            return probe_ogg(file_handle)
+        offset = skip_id3(file_handle)
+        if read_at(file_handle, offset, 4) == b"fLaC":
+            return probe_flac(file_handle, offset)
+    except StructError as exception:
+        raise AudioProbeException("Audio header is truncated.") from exception
+    raise AudioProbeException("Audio format is not supported.")
+
+
+def probe(path):
+    with open(path, "rb") as reader:
+        try:
+            return probe_file(reader)
+        except AudioProbeException as exception:
+            raise AudioProbeException(f"{path}: {exception}") from exception
@@ -0,0 +1,288 @@
+"""
+Sample plans
+Every sample edit (crop, loop and output format) is planned before any audio is touched.
+A plan is then run as one read of the source and one write of the destination.
+"""
+import asyncio
+from typing import NamedTuple
+from nanostudio_2_sample_converter.formats.sfz.exceptions import AudioProbeException
+from nanostudio_2_sample_converter.formats.sfz.utils.audio import (
+    add_loop_in_place,
+    build_wav_data,
+    create_sample_chunk,
+    crop_wav_data,
+    get_sample_rate,
+    has_loops,
+    write_audio_buffers,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.ffmpeg import (
+    DEFAULT_BATCH_SIZE,
+    WAV_CODEC,
+    FfmpegScheduler,
+    Transcode,
+    gather_or_cancel,
+    get_wav_codec,
+    iter_batches,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.probe import probe
+from nanostudio_2_sample_converter.formats.sfz.utils.wave_chunk_parser_extended.chunks_extended import (
+    RiffChunkIndex,
+)
+from nanostudio_2_sample_converter.utils.file_copy import (
+    LINK_MODE_AUTO,
+    LINK_MODE_HARDLINK,
+    copy_file,
+)
+
+WAV = "wav"
+
+
+class SampleEdit(NamedTuple):
+    """
+    Crop and loop of a sample, in frames of the uncropped source. The sample is only looped if
+    loop_end is set.
+    """
+
+    offset: int = None
+    end: int = None
+    loop_start: int = None
+    loop_end: int = None
+
+
+class SamplePlan:
+    __slots__ = (
+        "source",
+        "source_format",
+        "destination",
+        "destination_format",
+        "edit",
+        "source_hash",
+        "link_mode",
+    )
+
+    def __init__(
+        self,
+        source,
+        destination,
+        edit=SampleEdit(),
+        source_hash=None,
+        link_mode=LINK_MODE_AUTO,
+    ):
+        """
+        Args:
+            source (str): Path of the source sample.
+            destination (str): Path the sample is written to. Looped samples that are not
+                wav are converted, so their destination extension becomes .wav.
+            edit (SampleEdit): Crop and loop of the sample - optional.
+            source_hash (bytes): sha256 digest of the source if it has already been hashed -
+                optional.
+            link_mode (str): How sources that are not decoded are copied, one of LINK_MODES.
+        """
+        self.source = source
+        self.source_format = source.split(".")[-1].lower()
+        self.edit = edit
+        self.source_hash = source_hash
+        self.link_mode = link_mode
+        if self.is_looped and self.source_format != WAV:
+            self.destination = ".".join(destination.split(".")[:-1]) + "." + WAV
+            self.destination_format = WAV
+        else:
+            self.destination = destination
+            self.destination_format = self.source_format
+
+    @property
+    def is_cropped(self):
+        return bool(self.edit.offset or self.edit.end)
+
+    @property
+    def is_looped(self):
+        return self.edit.loop_end is not None
+
+    @property
+    def is_converted(self):
+        return self.destination_format != self.source_format
+
+    @property
+    def is_decoded(self):
+        return self.source_format != WAV and (self.is_cropped or self.is_converted)
+
+    @property
+    def loop_points(self):
+        """
+        Loop start and end relative to the cropped sample, loops never start before it.
+        """
+        offset = self.edit.offset or 0
+        loop_start = max((self.edit.loop_start or 0) - offset, 0)
+        return loop_start, max(self.edit.loop_end - offset, 0)
+
+    @property
+    def transcode(self):
+        """
+        Wav destinations keep the sample size of the source when its header can be probed.
+        """
+        wav_codec = WAV_CODEC
+        if self.destination_format == WAV:
+            try:
+                wav_codec = get_wav_codec(probe(self.source))
+            except AudioProbeException:
+                pass
+        return Transcode(
+            self.source,
+            self.destination,
+            self.destination_format,
+            (self.edit.offset, self.edit.end),
+            wav_codec,
+        )
+
+    def execute(self):
+        """
+        Reads the source, applies the crop, conversion and loop and writes the destination.
+        Returns True if a wav source ends up with loop points.
+        Plans that decode audio are run by ffmpeg in execute_sample_plans instead.
+        """
+        if self.source_format == WAV:
+            with open(self.source, "rb") as reader, RiffChunkIndex(
+                reader
+            ) as riff_index:
+                return self.__write_wav(riff_index)
+        copy_file(self.source, self.destination, self.link_mode)
+        return False
+
+    def finish_decode(self):
+        """
+        Patches the loop into a destination written by ffmpeg.
+        """
+        if self.is_looped:
+            self.__add_loop_in_place()
+        return False
+
+    def __add_loop_in_place(self):
+        with open(self.destination, "r+b") as writer:
+            with RiffChunkIndex(writer) as destination_index:
+                add_loop_in_place(destination_index, *self.loop_points)
+
+    def __write_wav(self, riff_index):
+        """
+        Writes an indexed wav source without decoding it. Uncropped samples are copied and
+        their loop is patched into the copy in place. Cropped samples are written as the header
+        chunks followed by a view of the kept frames of the source.
+        """
+        if not self.is_cropped:
+            link_mode = self.link_mode
+            if self.is_looped and link_mode == LINK_MODE_HARDLINK:
+                # The loop is patched into the copy, which must not share the source file
+                link_mode = LINK_MODE_AUTO
+            copy_file(self.source, self.destination, link_mode)
+            if not self.is_looped:
+                return has_loops(riff_index)
+            self.__add_loop_in_place()
+        else:
+            format_chunk, frames = crop_wav_data(
+                riff_index, self.edit.offset, self.edit.end
+            )
+            with frames:
+                sample_chunk = None
+                if self.is_looped:
+                    sample_chunk = create_sample_chunk(
+                        get_sample_rate(format_chunk), *self.loop_points
+                    )
+                write_audio_buffers(
+                    build_wav_data(format_chunk, frames, sample_chunk),
+                    self.destination,
+                )
+        if self.is_looped:
+            loop_start, loop_end = self.loop_points
+            return loop_start != loop_end
+        return False
+
+
+def create_batches(sample_plans, jobs=1, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Groups plans that decode audio into batches of at most batch_size files, split so every job
+    gets one. Every other plan is a batch of its own.
+    """
+    decode_plans = [
+        sample_plan for sample_plan in sample_plans if sample_plan.is_decoded
+    ]
+    if decode_plans:
+        batch_size = max(min(batch_size, -(-len(decode_plans) // max(jobs, 1))), 1)
+    batches = list(iter_batches(decode_plans, batch_size))
+    batches += [
+        [sample_plan] for sample_plan in sample_plans if not sample_plan.is_decoded
+    ]
+    return batches
+
+
+def load_cached_sample_plan(sample_plan, audio_cache):
+    """
+    Returns the cache key of a decoded plan and whether its destination was restored from the
+    cache.
+    """
+    key = audio_cache.create_key(sample_plan)
+    return key, audio_cache.load(key, sample_plan.destination)
+
+
+async def execute_sample_plans(
+    sample_plans, jobs=1, batch_size=DEFAULT_BATCH_SIZE, timeout=None, audio_cache=None
+):
+    """
+    Executes sample plans in the running event loop and returns their results in order.
+    Each batch of decodes is one ffmpeg process, at most jobs processes run at once and a process
+    that runs longer than timeout seconds is killed. Other plans run in threads, at most jobs at
+    once. If a plan fails, the remaining plans are cancelled. Plans must not share a destination.
+    With an audio cache, decoded outputs are restored from it and new ones are stored in it.
+    """
+    scheduler = FfmpegScheduler(jobs, timeout)
+    thread_semaphore = asyncio.Semaphore(jobs)
+
+    async def run_in_thread(function, *args):
+        async with thread_semaphore:
+            return await asyncio.to_thread(function, *args)
+
+    results = {}
+    cache_keys = {}
+    if audio_cache is not None:
+        decode_plans = [
+            sample_plan for sample_plan in sample_plans if sample_plan.is_decoded
+        ]
+        cached_plans = await gather_or_cancel(
+            *(
+                run_in_thread(load_cached_sample_plan, sample_plan, audio_cache)
+                for sample_plan in decode_plans
+            )
+        )
+        for sample_plan, (key, is_cached) in zip(decode_plans, cached_plans):
+            if is_cached:
+                # Decoded plans never report loops, see finish_decode
+                results[id(sample_plan)] = False
+            else:
+                cache_keys[id(sample_plan)] = key
+    batches = create_batches(
+        [sample_plan for sample_plan in sample_plans if id(sample_plan) not in results],
+        jobs,
+        batch_size,
+    )
+
+    def finish_decode_batch(batch):
+        batch_results = [sample_plan.finish_decode() for sample_plan in batch]
+        if audio_cache is not None:
+            for sample_plan in batch:
+                audio_cache.store(cache_keys[id(sample_plan)], sample_plan.destination)
+        return batch_results
+
+    async def execute_batch(batch):
+        # File reads and writes run in threads so they do not block running ffmpeg batches
+        if not batch[0].is_decoded:
+            return [await run_in_thread(batch[0].execute)]
+        transcodes = await run_in_thread(
+            lambda: [sample_plan.transcode for sample_plan in batch]
+        )
+        await scheduler.run_batch(transcodes)
+        return await run_in_thread(finish_decode_batch, batch)
+
+    batch_results = await gather_or_cancel(*map(execute_batch, batches))
+    for batch, batch_result in zip(batches, batch_results):
+        results.update(zip(map(id, batch), batch_result))
+    if cache_keys:
+        await run_in_thread(audio_cache.evict)
+    return [results[id(sample_plan)] for sample_plan in sample_plans]
@@ -0,0 +1,94 @@
+"""
+Sample path resolver
+Resolves sfz sample paths through cached directory listings. Every directory is listed once with
+os.scandir, so a lookup is a dict hit instead of a stat call. Backslashes are path separators and
+names are matched exactly first, then ignoring case and unicode normalization, so libraries
+written on Windows or macOS resolve on case-sensitive file systems.
+"""
+import os
+import unicodedata
+
+SEPARATOR = "/"
+PARENT_DIRECTORY = ".."
+
+
+def fold_name(name):
+    return unicodedata.normalize("NFC", name).casefold()
+
+
+def split_sample_path(sample_path):
+    """
+    Returns the root of a sample path, empty for relative paths, and its components.
+    """
+    sample_path = sample_path.replace("\\", SEPARATOR)
+    drive, path = os.path.splitdrive(sample_path)
+    root = drive + SEPARATOR if path.startswith(SEPARATOR) else drive
+    return root, [part for part in path.split(SEPARATOR) if part and part != "."]
+
+
+class SamplePathResolver:
+    def __init__(self, base_directories):
+        """
+        Args:
+            base_directories (list): Directories relative sample paths are looked up in, in order.
+                An empty string is the working directory.
+        """
+        self.base_directories = [str(directory) for directory in base_directories]
+        self.listings = {}
+
+    def __list_directory(self, directory):
+        """
+        Returns the (names, folded names) listing of a directory, or None if it cannot be listed.
+        Names map to whether the entry is a directory, folded names map to the first actual
+        name in sorted order.
+        """
+        if directory in self.listings:
+            return self.listings[directory]
+        listing = None
+        try:
+            with os.scandir(directory or os.curdir) as entries:
+                names = {}
+                for entry in entries:
+                    try:
+                        names[entry.name] = entry.is_dir()
+                    except OSError:
+                        names[entry.name] = False
+        except OSError:
+            names = None
+        if names is not None:
+            folded_names = {}
+            for name in sorted(names):
+                folded_names.setdefault(fold_name(name), name)
+            listing = (names, folded_names)
+        self.listings[directory] = listing
+        return listing
+
+    def __resolve_parts(self, directory, parts):
+        for index, part in enumerate(parts):
+            if part == PARENT_DIRECTORY:
+                directory = os.path.join(directory, part)
+                continue
+            listing = self.__list_directory(directory)
+            if listing is None:
+                return None
+            names, folded_names = listing
+            name = part if part in names else folded_names.get(fold_name(part))
+            if name is None or names[name] != (index < len(parts) - 1):
+                return None
+            directory = os.path.join(directory, name)
+        return directory
+
+    def resolve(self, sample_path):
+        """
+        Returns the path of an existing sample file, or None if it cannot be found.
+        """
+        root, parts = split_sample_path(sample_path)
+        if not parts:
+            return None
+        if root:
+            return self.__resolve_parts(root, parts)
+        for base_directory in self.base_directories:
+            resolved_path = self.__resolve_parts(base_directory, parts)
+            if resolved_path is not None:
+                return resolved_path
+        return None
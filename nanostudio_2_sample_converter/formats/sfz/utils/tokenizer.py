@@ -0,0 +1,56 @@
+"""
+Sfz tokenizer
+Splits sfz text into header and opcode tokens in a single regex pass.
+Note: syntax taken from sfzformat.com
+"""
+import re
+
+HEADER_TOKEN = "header"
+OPCODE_TOKEN = "opcode"
+INCLUDE_TOKEN = "include"
+DEFINE_TOKEN = "define"
+
+OPCODE_NAME = r"[A-Za-z_$][\w$]*"
+
+TOKEN_REGEX = re.compile(
+    r"//[^\r\n]*"
+    r"|/\*.*?\*/"
+    r"|<(?P<header>\w+)>"
+    r'|#include\s+"(?P<include>[^"\r\n]*)"'
+    r"|#define\s+(?P<define>\$\w+)[ \t]+(?P<define_value>[^\r\n]*?)(?=\s*//|\s*$)"
+    rf"|(?P<opcode>{OPCODE_NAME})="
+    r'(?:"(?P<quoted>[^"\r\n]*)"|(?P<value>[^\r\n]*?))'
+    rf"(?=\s+{OPCODE_NAME}=|\s*<|\s+#(?:include|define)\b|\s*//|\s*$)",
+    re.DOTALL | re.MULTILINE,
+)
+
+
+def tokenize(sfz_string):
+    """
+    Yields (token type, name, value) tuples for every header and opcode in an sfz string.
+    Headers are yielded as (HEADER_TOKEN, header, None) and opcodes as (OPCODE_TOKEN, opcode, value).
+    Preprocessor directives are yielded as (INCLUDE_TOKEN, path, None) and
+    (DEFINE_TOKEN, $variable, value). Comments are skipped. Unquoted values run to the next
+    opcode, header, directive, comment or line end, so sample paths may contain spaces.
+    """
+    for match in TOKEN_REGEX.finditer(sfz_string):
+        header, opcode = match.group("header", "opcode")
+        if header:
+            yield HEADER_TOKEN, header, None
+        elif opcode:
+            quoted = match.group("quoted")
+            yield OPCODE_TOKEN, opcode, (
+                quoted if quoted is not None else match.group("value").strip()
+            )
+        elif match.group("include") is not None:
+            yield INCLUDE_TOKEN, match.group("include"), None
+        elif match.group("define"):
+            yield DEFINE_TOKEN, match.group("define"), match.group(
+                "define_value"
+            ).strip()
+
+
+def tokenize_file(sfz_file_path):
+    with open(sfz_file_path, "r", encoding="utf-8", errors="ignore") as reader:
+        sfz_string = reader.read()
+    yield from tokenize(sfz_string)
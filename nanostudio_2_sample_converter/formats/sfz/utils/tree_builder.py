@@ -0,0 +1,79 @@
+"""
+Sfz tree builder
+Builds the sfz header tree directly from the sfz token stream.
+"""
+from nanostudio_2_sample_converter.formats.sfz.opcodes import lookup_opcode
+from nanostudio_2_sample_converter.formats.sfz.headers import (
+    HEADER_CLASSES,
+    Header,
+    Control,
+    Global,
+    Group,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.tokenizer import (
+    HEADER_TOKEN,
+    OPCODE_TOKEN,
+)
+
+MASTER_HEADER = "master"
+
+
+def convert_opcode_value(opcode, value):
+    return lookup_opcode(opcode)[1].convert(value)
+
+
+def build_tree(sfz_tokens):
+    """
+    Creates the control -> global -> group -> region tree from sfz tokens.
+    Missing parent headers are created implicitly and repeated <control> headers are merged.
+    The tree has no <master> level, so the opcodes of a <master> are copied into every group
+    after it, up to the next <master>, <global> or <control>.
+    Unsupported headers and opcodes are dropped, aliases are renamed and opcode values are typed.
+    """
+    control = Control()
+    global_header = None
+    master_opcodes = {}
+    group = None
+    header = None
+    for token_type, name, value in sfz_tokens:
+        if token_type == HEADER_TOKEN:
+            if name == MASTER_HEADER:
+                master_opcodes = {}
+                group = None
+                header = Header(master_opcodes)
+                continue
+            header_class = HEADER_CLASSES.get(name)
+            if header_class is Control:
+                global_header = None
+                master_opcodes = {}
+                group = None
+                header = control
+                continue
+            if header_class is None:
+                header = None
+                continue
+            if header_class is Global:
+                header = Global()
+                control.add_child(header)
+                global_header = header
+                master_opcodes = {}
+                group = None
+                continue
+            if global_header is None:
+                global_header = Global()
+                control.add_child(global_header)
+            if header_class is Group:
+                header = Group(dict(master_opcodes))
+                global_header.add_child(header)
+                group = header
+                continue
+            header = header_class()
+            if group is None:
+                group = Group(dict(master_opcodes))
+                global_header.add_child(group)
+            group.add_child(header)
+        elif token_type == OPCODE_TOKEN and header is not None:
+            opcode_name, opcode = lookup_opcode(name)
+            if opcode is not None and opcode.level is not None:
+                header.opcodes[opcode_name] = opcode.convert(value)
+    return control
@@ -0,0 +1,29 @@
+"""
+Sfz velocity layer functions
+Resolves overlapping <group> velocity ranges into NanoStudio 2 velocity layers.
+"""
+MAX_VELOCITY = 127
+
+
+def resolve_velocity_layers(groups):
+    """
+    Returns the groups whose lovel/hivel ranges do not overlap, sorted by velocity.
+    Groups are swept in (lovel, hivel, document order) order and a group is kept when it starts
+    above the highest velocity kept so far. Runs in O(G log G).
+    """
+    layers = []
+    for group in sorted(groups, key=lambda group: (group.lovel, group.hivel)):
+        if not layers or group.lovel > layers[-1].hivel:
+            layers.append(group)
+    return layers
+
+
+def get_split_3_levels(layers):
+    """
+    Returns the (S3L1, S3L2) Obsidian split levels for up to three sorted velocity layers.
+    """
+    if not layers:
+        return None, None
+    split_3_level_1 = layers[0].hivel / MAX_VELOCITY
+    split_3_level_2 = layers[2].lovel / MAX_VELOCITY if len(layers) > 2 else 1.0
+    return str(split_3_level_1), str(max(split_3_level_1, split_3_level_2))
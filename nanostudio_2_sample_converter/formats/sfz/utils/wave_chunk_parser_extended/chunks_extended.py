@@ -1,6 +1,9 @@
 # pylint: disable=too-many-instance-attributes, too-many-arguments, unused-variable
 from __future__ import annotations
-from struct import unpack, pack
+import mmap
+from array import array
+from itertools import chain
+from struct import unpack, unpack_from, iter_unpack, pack, pack_into
 from typing import BinaryIO, List, Dict
 from wave_chunk_parser.exceptions import (
     InvalidHeaderException,
@@ -8,10 +11,159 @@ from wave_chunk_parser.exceptions import (
 from wave_chunk_parser.chunks import Chunk, RiffChunk, FormatChunk, DataChunk, CartChunk
 from wave_chunk_parser.utils import seek_and_read
 
+STRUCT_RIFF_HEADER = "<4sI4s"
+STRUCT_CHUNK_HEADER = "<4sI"
+LENGTH_RIFF_HEADER = 12
+LENGTH_CHUNK_HEADER = 8
+OFFSET_RIFF_LENGTH = 4
+HEADER_JUNK = b"JUNK"
+PAD_BYTE = b"\x00"
+
+
+class RiffChunkIndex:
+    """
+    Index of the chunks of a RIFF WAVE file, built by seeking from chunk header to chunk header.
+    Chunk contents are only read when asked for and the data chunk is exposed as a lazy
+    memory mapped view, so indexing a file costs a few bytes of I/O per chunk.
+    """
+
+    def __init__(self, file_handle: BinaryIO):
+        """
+        Args:
+            file_handle (BinaryIO): Seekable binary file, or a BytesIO for in-memory audio.
+        """
+        self.file_handle = file_handle
+        self.entries = []
+        self.__map = None
+        self.__view = None
+        header = seek_and_read(file_handle, 0, LENGTH_RIFF_HEADER)
+        if len(header) < LENGTH_RIFF_HEADER:
+            raise InvalidHeaderException("WAVE files must have a RIFF header")
+        riff, self.riff_length, wave = unpack(STRUCT_RIFF_HEADER, header)
+        if not riff == RiffChunk.HEADER_RIFF:
+            raise InvalidHeaderException("WAVE files must have a RIFF header")
+        if not wave == RiffChunk.HEADER_WAVE:
+            raise InvalidHeaderException("This library only supports WAVE files")
+        file_handle.seek(0, 2)
+        self.file_length = file_handle.tell()
+        end_of_file = min(self.file_length, self.riff_length + LENGTH_CHUNK_HEADER)
+        offset = LENGTH_RIFF_HEADER
+        while offset + LENGTH_CHUNK_HEADER <= end_of_file:
+            chunk_id, chunk_length = unpack(
+                STRUCT_CHUNK_HEADER,
+                seek_and_read(file_handle, offset, LENGTH_CHUNK_HEADER),
+            )
+            self.entries.append((chunk_id, offset + LENGTH_CHUNK_HEADER, chunk_length))
+            # Chunks are word aligned, odd length chunks are followed by a pad byte
+            offset += LENGTH_CHUNK_HEADER + chunk_length + (chunk_length & 1)
+        self.__index_chunks()
+
+    def __index_chunks(self) -> None:
+        self.chunks = {}
+        for entry in self.entries:
+            self.chunks.setdefault(entry[0], entry)
+
+    def __contains__(self, chunk_id: bytes) -> bool:
+        return chunk_id in self.chunks
+
+    def __enter__(self) -> RiffChunkIndex:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def read(self, chunk_id: bytes) -> bytes:
+        """
+        Reads the contents of a single chunk.
+        """
+        _, offset, length = self.chunks[chunk_id]
+        return seek_and_read(self.file_handle, offset, length)
+
+    def read_raw(self, chunk_id: bytes) -> bytes:
+        """
+        Reads a single chunk including its header.
+        """
+        _, offset, length = self.chunks[chunk_id]
+        return seek_and_read(
+            self.file_handle,
+            offset - LENGTH_CHUNK_HEADER,
+            length + LENGTH_CHUNK_HEADER,
+        )
+
+    def data_view(self) -> memoryview:
+        """
+        Returns the contents of the data chunk as a view of the memory mapped file.
+        Pages are only read from disk when the view is accessed.
+        Views taken from it must be released before the index is closed.
+        """
+        if self.__view is None:
+            try:
+                fileno = self.file_handle.fileno()
+            except (AttributeError, OSError):
+                self.__view = memoryview(
+                    seek_and_read(self.file_handle, 0, self.file_length)
+                )
+            else:
+                self.__map = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+                self.__view = memoryview(self.__map)
+        _, offset, length = self.chunks[RiffChunk.CHUNK_DATA]
+        return self.__view[offset : offset + length]
+
+    def write_chunk(self, chunk: bytes) -> None:
+        """
+        Writes a chunk, header included, into the file in place.
+        A chunk with the same id and length is overwritten. Otherwise any chunk with the same id
+        is relabelled as JUNK, the new chunk is appended after the last chunk and the RIFF size
+        is patched. Only the chunk and a few header bytes are written, every other chunk is kept.
+        The file handle must be open for reading and writing.
+        """
+        chunk_id, chunk_length = unpack(
+            STRUCT_CHUNK_HEADER, chunk[:LENGTH_CHUNK_HEADER]
+        )
+        existing = self.chunks.get(chunk_id)
+        if existing is not None and existing[2] == chunk_length:
+            self.file_handle.seek(existing[1] - LENGTH_CHUNK_HEADER)
+            self.file_handle.write(chunk)
+            return
+        for index, (entry_id, offset, length) in enumerate(self.entries):
+            if entry_id == chunk_id:
+                self.file_handle.seek(offset - LENGTH_CHUNK_HEADER)
+                self.file_handle.write(HEADER_JUNK)
+                self.entries[index] = (HEADER_JUNK, offset, length)
+        end = LENGTH_RIFF_HEADER
+        if self.entries:
+            _, offset, length = self.entries[-1]
+            end = min(offset + length, self.file_length)
+        self.file_handle.seek(end)
+        if end & 1:
+            self.file_handle.write(PAD_BYTE)
+            end += 1
+        self.file_handle.write(chunk)
+        self.entries.append((chunk_id, end + LENGTH_CHUNK_HEADER, chunk_length))
+        end += len(chunk)
+        if chunk_length & 1:
+            self.file_handle.write(PAD_BYTE)
+            end += 1
+        self.file_handle.truncate(end)
+        self.riff_length = end - LENGTH_CHUNK_HEADER
+        self.file_length = end
+        self.file_handle.seek(OFFSET_RIFF_LENGTH)
+        self.file_handle.write(pack("<I", self.riff_length))
+        self.__index_chunks()
+
+    def close(self) -> None:
+        if self.__view is not None:
+            self.__view.release()
+            self.__view = None
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
 
 class SampleChunk(Chunk):
     """
     The sample chunk defines how the audio is played back by a sampler.
+    Any number of loops is supported, they are stored as a flat array of loop fields.
     """
 
     __manufacturer: int
@@ -21,18 +173,15 @@ class SampleChunk(Chunk):
     __midi_pitch_fraction: int
     __smpte_format: int
     __smpte_offset: int
-    __number_of_sample_loops: int
-    __sampler_data: int
-    __first_cue_point_id: int
-    __first_cue_point_type: int
-    __first_cue_point_start: int
-    __first_cue_point_end: int
-    __first_cue_point_fraction: int
-    __first_cue_point_play_count: int
-
-    LENGTH_CHUNK = 68
-    LENGTH_STANDARD_SIZE = 60
+    __loops: array
+    __sampler_specific_data: bytes
+
+    LENGTH_SAMPLE_HEADER = 36
+    LENGTH_LOOP = 24
+    LOOP_FIELDS = 6
     HEADER_SAMPLE = b"smpl"
+    STRUCT_SAMPLE_HEADER = "<IIIIIIIII"
+    STRUCT_LOOP = "<IIIIII"
 
     def __init__(
         self,
@@ -43,19 +192,18 @@ class SampleChunk(Chunk):
         midi_pitch_fraction: int,
         smpte_format: int,
         smpte_offset: int,
-        number_of_sample_loops: int,
-        sampler_data: int,
-        first_cue_point_id: int,
-        first_loop_type: int,
-        first_loop_start: int,
-        first_loop_end: int,
-        first_loop_fraction: int,
-        first_loop_play_count: int,
+        first_cue_point_id: int = 0,
+        first_loop_type: int = 0,
+        first_loop_start: int = 0,
+        first_loop_end: int = 0,
+        first_loop_fraction: int = 0,
+        first_loop_play_count: int = 0,
+        loops: array = None,
+        sampler_specific_data: bytes = b"",
     ):
         """
         Creates a new instance of the sample block.
         https://sites.google.com/site/musicgapi/technical-documents/wav-file-format#fmt
-        TODO: extract and write more than first loop point.
 
         Args:
             manufacturer (int): MIDI Manufacturer's Association Manufacturer code.
@@ -65,14 +213,15 @@ class SampleChunk(Chunk):
             midi_pitch_fraction (int): Fraction of a semitone up from the specified MIDI unity note field.
             smpte_format (int): SMPTE time format used in the following SMPTE Offset field.
             smpte_offset (int): SMPTE time offset to be used.
-            number_of_sample_loops (int): Number of sample loops.
-            sampler_data (int): Number of bytes that will follow this chunk.
             first_cue_point_id (int): Unique ID that corresponds to one of the defined cue points.
             first_loop_type (int): Defines how the waveform samples will be looped.
             first_loop_start (int): Byte offset into the waveform data of the first sample to be played in the loop.
             first_loop_end (int): Byte offset into the waveform data of the last sample to be played in the loop.
             first_loop_fraction (int): Fraction of a sample at which to loop.
             first_loop_play_count (int): Number of times to play the loop.
+            loops (array): Unsigned int array of the fields of every loop, LOOP_FIELDS per loop.
+                Replaces the first loop arguments when given.
+            sampler_specific_data (bytes): Sampler specific data that follows the loops.
         """
 
         self.__manufacturer = manufacturer
@@ -82,14 +231,20 @@ class SampleChunk(Chunk):
         self.__midi_pitch_fraction = midi_pitch_fraction
         self.__smpte_format = smpte_format
         self.__smpte_offset = smpte_offset
-        self.__number_of_sample_loops = number_of_sample_loops
-        self.__sampler_data = sampler_data
-        self.__first_cue_point_id = first_cue_point_id
-        self.__first_loop_type = first_loop_type
-        self.__first_loop_start = first_loop_start
-        self.__first_loop_end = first_loop_end
-        self.__first_loop_fraction = first_loop_fraction
-        self.__first_loop_play_count = first_loop_play_count
+        if loops is None:
+            loops = array(
+                "I",
+                [
+                    first_cue_point_id,
+                    first_loop_type,
+                    first_loop_start,
+                    first_loop_end,
+                    first_loop_fraction,
+                    first_loop_play_count,
+                ],
+            )
+        self.__loops = loops
+        self.__sampler_specific_data = sampler_specific_data
 
     @classmethod
     def from_file(cls, file_handle: BinaryIO, offset: int) -> SampleChunk:
@@ -103,49 +258,31 @@ class SampleChunk(Chunk):
 
         # Read from the chunk
 
-        (
-            manufacturer,
-            product,
-            sample_period,
-            midi_unity_note,
-            midi_pitch_fraction,
-            smpte_format,
-            smpte_offset,
+        body = memoryview(
+            seek_and_read(file_handle, offset + cls.OFFSET_CHUNK_CONTENT, length)
+        )
+        if len(body) < cls.LENGTH_SAMPLE_HEADER:
+            raise InvalidHeaderException("Sample chunk is too short")
+        header = unpack_from(cls.STRUCT_SAMPLE_HEADER, body)
+        number_of_sample_loops, sampler_data = header[7], header[8]
+        loops_length = cls.LENGTH_LOOP * min(
             number_of_sample_loops,
-            sampler_data,
-            first_cue_point_id,
-            first_loop_type,
-            first_loop_start,
-            first_loop_end,
-            first_loop_fraction,
-            first_loop_play_count,
-        ) = unpack(
-            "<IIIIIIIIIIIIIII",
-            seek_and_read(
-                file_handle,
-                offset + cls.OFFSET_CHUNK_CONTENT,
-                cls.LENGTH_CHUNK - cls.OFFSET_CHUNK_CONTENT,
+            (len(body) - cls.LENGTH_SAMPLE_HEADER) // cls.LENGTH_LOOP,
+        )
+        loops_end = cls.LENGTH_SAMPLE_HEADER + loops_length
+        loops = array(
+            "I",
+            chain.from_iterable(
+                iter_unpack(cls.STRUCT_LOOP, body[cls.LENGTH_SAMPLE_HEADER : loops_end])
             ),
         )
 
         # Generate our object
 
         return SampleChunk(
-            manufacturer,
-            product,
-            sample_period,
-            midi_unity_note,
-            midi_pitch_fraction,
-            smpte_format,
-            smpte_offset,
-            number_of_sample_loops,
-            sampler_data,
-            first_cue_point_id,
-            first_loop_type,
-            first_loop_start,
-            first_loop_end,
-            first_loop_fraction,
-            first_loop_play_count,
+            *header[:7],
+            loops=loops,
+            sampler_specific_data=bytes(body[loops_end : loops_end + sampler_data]),
         )
 
     @property
@@ -202,56 +339,89 @@ class SampleChunk(Chunk):
         """
         Number of sample loops.
         """
-        return self.__number_of_sample_loops
+        return self.loop_count
 
     @property
     def sampler_data(self) -> int:
         """
         Number of bytes that will follow this chunk.
         """
-        return self.__sampler_data
+        return len(self.__sampler_specific_data)
+
+    @property
+    def loops(self) -> array:
+        """
+        Fields of every loop as a flat unsigned int array, LOOP_FIELDS per loop.
+        """
+        return self.__loops
+
+    @property
+    def loop_count(self) -> int:
+        """
+        Number of loops stored in the chunk.
+        """
+        return len(self.__loops) // self.LOOP_FIELDS
+
+    def get_loop(self, index: int) -> tuple:
+        """
+        Returns the (cue point id, type, start, end, fraction, play count) of a loop.
+        """
+        if not 0 <= index < self.loop_count:
+            raise IndexError("Sample chunk loop index out of range")
+        start = index * self.LOOP_FIELDS
+        return tuple(self.__loops[start : start + self.LOOP_FIELDS])
+
+    @property
+    def sampler_specific_data(self) -> bytes:
+        """
+        Sampler specific data that follows the loops.
+        """
+        return self.__sampler_specific_data
+
+    def __get_first_loop_field(self, field: int) -> int:
+        return self.__loops[field] if self.__loops else 0
 
     @property
     def first_cue_point_id(self) -> int:
         """
         Unique ID that corresponds to one of the defined cue points.
         """
-        return self.__first_cue_point_id
+        return self.__get_first_loop_field(0)
 
     @property
     def first_loop_type(self) -> int:
         """
         Defines how the waveform samples will be looped.
         """
-        return self.__first_loop_type
+        return self.__get_first_loop_field(1)
 
     @property
     def first_loop_start(self) -> int:
         """
         Byte offset into the waveform data of the first sample to be played in the loop.
         """
-        return self.__first_loop_start
+        return self.__get_first_loop_field(2)
 
     @property
     def first_loop_end(self) -> int:
         """
         Byte offset into the waveform data of the last sample to be played in the loop.
         """
-        return self.__first_loop_end
+        return self.__get_first_loop_field(3)
 
     @property
     def first_loop_fraction(self) -> int:
         """
         Fraction of a sample at which to loop.
         """
-        return self.__first_loop_fraction
+        return self.__get_first_loop_field(4)
 
     @property
     def first_loop_play_count(self) -> int:
         """
         Number of times to play the loop.
         """
-        return self.__first_loop_play_count
+        return self.__get_first_loop_field(5)
 
     @property
     def get_name(self) -> str:
@@ -259,12 +429,21 @@ class SampleChunk(Chunk):
 
     def to_bytes(self) -> List[bytes]:
 
-        # Build up our chunk
+        # Build up our chunk in a single pack, the loop count and sampler data length are
+        # taken from the loops and data actually written
 
-        return pack(
-            "<4sIIIIIIIIIIIIIIII",
+        length = (
+            self.LENGTH_SAMPLE_HEADER
+            + len(self.__loops) * 4
+            + len(self.__sampler_specific_data)
+        )
+        chunk = bytearray(self.OFFSET_CHUNK_CONTENT + length)
+        pack_into(
+            f"<4sI9I{len(self.__loops)}I{len(self.__sampler_specific_data)}s",
+            chunk,
+            0,
             self.HEADER_SAMPLE,
-            self.LENGTH_STANDARD_SIZE,
+            length,
             self.manufacturer,
             self.product,
             self.sample_period,
@@ -274,13 +453,10 @@ class SampleChunk(Chunk):
             self.smpte_offset,
             self.number_of_sample_loops,
             self.sampler_data,
-            self.first_cue_point_id,
-            self.first_loop_type,
-            self.first_loop_start,
-            self.first_loop_end,
-            self.first_loop_fraction,
-            self.first_loop_play_count,
+            *self.__loops,
+            self.__sampler_specific_data,
         )
+        return bytes(chunk)
 
 
 class RiffChunkExtended(RiffChunk):
@@ -0,0 +1,138 @@
+"""
+Disk cache
+Size-capped on-disk cache of binary values with least recently used eviction.
+Entries are written atomically, so several converter processes can share one cache directory.
+"""
+import hashlib
+import os
+import tempfile
+from nanostudio_2_sample_converter.utils.file_copy import copy_file
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "nanostudio_2_sample_converter",
+)
+ENTRY_EXTENSION = ".bin"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_key(*parts):
+    """
+    Returns a hex cache key for any number of str or bytes parts.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        part = part.encode("utf-8") if isinstance(part, str) else part
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def hash_file(file_path):
+    """
+    Returns the sha256 digest of a file, read in blocks so large files are never fully loaded.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as reader:
+        for block in iter(lambda: reader.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+class DiskCache:
+    def __init__(self, directory, max_bytes):
+        """
+        Args:
+            directory (str): Directory the cache entries are stored in.
+            max_bytes (int): Total size the entries are evicted down to after every write.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def __entry_path(self, key):
+        return os.path.join(self.directory, key + ENTRY_EXTENSION)
+
+    def get(self, key):
+        """
+        Returns the cached bytes for a key, or None. Reading an entry marks it as recently used.
+        """
+        entry_path = self.__entry_path(key)
+        try:
+            with open(entry_path, "rb") as reader:
+                value = reader.read()
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        return value
+
+    def copy_to(self, key, destination):
+        """
+        Copies the entry for a key to a file and marks it as recently used.
+        Returns False if there is no entry for the key.
+        """
+        entry_path = self.__entry_path(key)
+        try:
+            copy_file(entry_path, destination)
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=self.directory, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "wb") as writer:
+                writer.write(value)
+            os.replace(temporary_path, self.__entry_path(key))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        self.evict()
+
+    def put_file(self, key, path, evict=True):
+        """
+        Copies a file into the cache. Pass evict=False when storing many files and call evict
+        once afterwards.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=self.directory, suffix=".tmp"
+        )
+        os.close(file_descriptor)
+        try:
+            copy_file(path, temporary_path)
+            os.replace(temporary_path, self.__entry_path(key))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes.
+        """
+        entries = []
+        with os.scandir(self.directory) as directory_entries:
+            for entry in directory_entries:
+                if entry.name.endswith(ENTRY_EXTENSION):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total_bytes = sum(size for (_, size, _) in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            except PermissionError:
+                # Entries open in another process cannot be removed on Windows
+                continue
+            total_bytes -= size
@@ -37,3 +37,27 @@ class ConverterUnsupportedDestinationFormatException(Exception):
     """
 
     pass
+
+
+class ConverterJobsException(Exception):
+    """
+    Indicates the jobs argument is not a positive number.
+    """
+
+    pass
+
+
+class ConverterCacheSizeException(Exception):
+    """
+    Indicates the cache size argument is not a positive number.
+    """
+
+    pass
+
+
+class ConverterTimeoutException(Exception):
+    """
+    Indicates the timeout argument is not a positive number.
+    """
+
+    pass
@@ -0,0 +1,95 @@
+"""
+File copy strategies
+Files are cloned or linked instead of copied where the file system allows it. Every strategy
+falls back to the next one: a reflink clone (FICLONE), a hardlink when asked for,
+os.copy_file_range and finally a plain copy.
+"""
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LINK_MODE_AUTO = "auto"
+LINK_MODE_HARDLINK = "hardlink"
+LINK_MODE_COPY = "copy"
+LINK_MODES = [LINK_MODE_AUTO, LINK_MODE_HARDLINK, LINK_MODE_COPY]
+
+# Linux ioctl that shares the extents of one file with another, _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+def reflink(source, destination):
+    if fcntl is None:
+        return False
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        try:
+            fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+        except OSError:
+            return False
+    return True
+
+
+def hardlink(source, destination):
+    try:
+        os.remove(destination)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(source, destination)
+    except OSError:
+        return False
+    return True
+
+
+def copy_range(source, destination):
+    """
+    Copies with os.copy_file_range, which lets the kernel copy without reading the file into
+    user space and clone it on file systems that support it.
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        length = os.fstat(source_file.fileno()).st_size
+        offset = 0
+        try:
+            while offset < length:
+                copied = os.copy_file_range(
+                    source_file.fileno(),
+                    destination_file.fileno(),
+                    length - offset,
+                    offset,
+                    offset,
+                )
+                if copied == 0:
+                    break
+                offset += copied
+        except OSError:
+            return False
+    return offset == length
+
+
+def copy(source, destination):
+    shutil.copyfile(source, destination)
+    return True
+
+
+# The hardlink is tried before copy_file_range, which does not fail where a link could be made
+STRATEGIES = {
+    LINK_MODE_AUTO: (reflink, copy_range, copy),
+    LINK_MODE_HARDLINK: (reflink, hardlink, copy_range, copy),
+    LINK_MODE_COPY: (copy,),
+}
+
+
+def copy_file(source, destination, link_mode=LINK_MODE_AUTO):
+    """
+    Copies source to destination with the first strategy of the link mode that works and
+    returns its name. Hardlinked destinations share the source file, so they must not be edited.
+    """
+    for strategy in STRATEGIES[link_mode]:
+        if strategy(source, destination):
+            return strategy.__name__
+    return None
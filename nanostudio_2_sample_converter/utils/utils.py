@@ -5,7 +5,11 @@ from nanostudio_2_sample_converter.utils.exceptions import (
     ConverterUnsupportedSourceFormatException,
     ConverterDestinationException,
     ConverterUnsupportedDestinationFormatException,
+    ConverterJobsException,
+    ConverterTimeoutException,
+    ConverterCacheSizeException,
 )
+from nanostudio_2_sample_converter.utils.file_copy import LINK_MODES, LINK_MODE_AUTO
 
 SUPPORTED_SOURCE_FORMATS = ["sfz"]
 SUPPORTED_DESTINATION_FORMATS = ["obs"]
@@ -18,6 +22,39 @@ def create_parser():
     parser.add_argument(
         "--format", help="destination file format - optional - defaults to obs"
     )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="print sfz normalization pass timings - optional",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="do not read or write the parsed sfz and decoded audio caches - optional",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        help="megabytes of decoded audio kept in the cache - optional - defaults to 1024",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of samples processed in parallel - optional - defaults to 1",
+    )
+    parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default=LINK_MODE_AUTO,
+        help="how unedited samples are copied, auto clones them where the file system "
+        "supports it and hardlink also links them - optional - defaults to auto",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="seconds before a single ffmpeg process is stopped - optional",
+    )
     return parser
 
 
@@ -57,8 +94,20 @@ def create_args(args):
             + "."
         )
         raise ConverterUnsupportedDestinationFormatException(error)
+    if args.jobs < 1:
+        raise ConverterJobsException("Error! --jobs must be at least 1.")
+    if args.cache_size is not None and args.cache_size < 1:
+        raise ConverterCacheSizeException("Error! --cache-size must be at least 1.")
+    if args.timeout is not None and args.timeout <= 0:
+        raise ConverterTimeoutException("Error! --timeout must be greater than 0.")
     return {
         "source": source,
         "destination": destination,
         "destination_format": destination_format,
+        "timings": args.timings,
+        "no_cache": args.no_cache,
+        "cache_size": args.cache_size,
+        "jobs": args.jobs,
+        "timeout": args.timeout,
+        "link_mode": args.link_mode,
     }
@@ -102,7 +102,7 @@ setup(
         "nanostudio_2_sample_converter.formats.sfz.utils",
         "nanostudio_2_sample_converter.formats.sfz.utils.wave_chunk_parser_extended",
     ],
-    python_requires=">=3",
+    python_requires=">=3.9",
     entry_points={
         "console_scripts": ["ns2samplconv=nanostudio_2_sample_converter.converter:main"]
     },
@@ -0,0 +1,22 @@
+from unittest import TestCase
+from nanostudio_2_sample_converter.formats.sfz import schema
+from nanostudio_2_sample_converter.formats.sfz.compiled_schema import (
+    HEADER_SPECS,
+    KEY_OPCODES,
+    REGION,
+    GROUP,
+)
+
+
+class TestCompiledSchema(TestCase):
+    def test_header_specs(self):
+        self.assertEqual(set(schema.HEADERS), set(HEADER_SPECS))
+        self.assertIs(REGION, HEADER_SPECS["region"])
+        self.assertIsInstance(REGION.opcodes, frozenset)
+        self.assertIn(schema.SAMPLE, REGION.opcodes)
+        self.assertEqual({schema.LO_VEL, schema.HI_VEL, "tune"}, GROUP.opcodes)
+        self.assertEqual("file_name", REGION.obsidian_opcode_rename[schema.SAMPLE])
+
+    def test_opcodes(self):
+        self.assertIsInstance(KEY_OPCODES, frozenset)
+        self.assertIn(schema.PITCH_KEYCENTER, KEY_OPCODES)
@@ -0,0 +1,65 @@
+from unittest import TestCase
+from nanostudio_2_sample_converter.formats.sfz.headers import (
+    Control,
+    Global,
+    Group,
+    Region,
+)
+
+
+class TestHeaders(TestCase):
+    def setUp(self):
+        self.region = Region({"sample": "a.wav", "lokey": 60, "hikey": 62})
+        self.group = Group({"lovel": 0, "hivel": 63}, [self.region])
+        self.control = Control({}, [Global({}, [self.group])])
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            self.region.unknown = 1
+        self.assertFalse(hasattr(self.region, "__dict__"))
+
+    def test_typed_fields(self):
+        self.assertEqual("a.wav", self.region.sample)
+        self.assertEqual(60, self.region.lokey)
+        self.assertEqual(62, self.region.hikey)
+        self.assertIsNone(self.region.pitch_keycenter)
+        self.assertEqual(0, self.group.lovel)
+        self.assertEqual(63, self.group.hivel)
+
+    def test_iteration(self):
+        self.assertEqual([self.group], list(self.control.iter_groups()))
+        self.assertEqual([self.region], list(self.control.iter_regions()))
+        self.assertEqual(
+            ["control", "global", "group", "region"],
+            [header.header for header in self.control.iter()],
+        )
+
+    def test_to_xml(self):
+        element = self.control.to_xml()
+        self.assertEqual("control", element.tag)
+        region = element.find("global/group/region")
+        self.assertEqual(
+            {"sample": "a.wav", "lokey": "60", "hikey": "62"}, dict(region.attrib)
+        )
+
+    def test_effective_opcodes(self):
+        self.control.opcodes["default_path"] = "samples/"
+        self.group.opcodes["lokey"] = 10
+        self.group.opcodes["pitch_keycenter"] = 61
+        self.assertIs(self.group, self.region.parent)
+        self.assertEqual(60, self.region.lokey)
+        self.assertEqual(61, self.region.pitch_keycenter)
+        self.assertEqual("samples/", self.region.get_opcode("default_path"))
+        self.assertEqual("x", self.region.get_opcode("loop_mode", "x"))
+        effective_opcodes = self.region.effective_opcodes
+        self.assertEqual(60, effective_opcodes["lokey"])
+        self.assertEqual("samples/", effective_opcodes["default_path"])
+        effective_opcodes["loop_mode"] = "one_shot"
+        self.assertEqual("one_shot", self.region.opcodes["loop_mode"])
+        self.assertNotIn("loop_mode", self.group.opcodes)
+
+    def test_add_child(self):
+        region = Region({"sample": "b.wav"})
+        self.group.add_child(region)
+        self.assertIs(self.group, region.parent)
+        self.assertEqual(63, region.get_opcode("hivel"))
@@ -0,0 +1,55 @@
+from unittest import TestCase
+from nanostudio_2_sample_converter.formats.sfz.exceptions import (
+    SfzInvalidKeyException,
+    SfzInvalidOpcodeValueException,
+)
+from nanostudio_2_sample_converter.formats.sfz.opcodes import (
+    OPCODE_TABLE,
+    OPCODE_DATABASE,
+    INTEGER,
+    REGION_LEVEL,
+    GROUP_LEVEL,
+    lookup_opcode,
+    get_level_opcodes,
+)
+
+
+class TestOpcodes(TestCase):
+    def test_database(self):
+        names = [row[0] for row in OPCODE_TABLE]
+        self.assertEqual(len(set(names)), len(names))
+        self.assertGreater(len(names), 300)
+        opcode = OPCODE_DATABASE["loop_start"]
+        self.assertEqual(INTEGER, opcode.type)
+        self.assertEqual(REGION_LEVEL, opcode.level)
+        self.assertIs(opcode, OPCODE_DATABASE["loopstart"])
+
+    def test_lookup_opcode(self):
+        self.assertEqual("sample", lookup_opcode("sample")[0])
+        self.assertEqual("tune", lookup_opcode("pitch")[0])
+        self.assertEqual("loop_mode", lookup_opcode("loopmode")[0])
+        name, opcode = lookup_opcode("locc64")
+        self.assertEqual(("locc64", "loccN"), (name, opcode.name))
+        self.assertEqual("cutoff_oncc1", lookup_opcode("cutoff_cc1")[0])
+        self.assertEqual("eq2_freq_oncc7", lookup_opcode("eq2_freqcc7")[0])
+        self.assertEqual("eg01_time3", lookup_opcode("eg01_time3")[0])
+        self.assertEqual(("unknown_opcode", None), lookup_opcode("unknown_opcode"))
+
+    def test_convert(self):
+        self.assertEqual(60, lookup_opcode("lokey")[1].convert("c4"))
+        self.assertEqual(-35, lookup_opcode("tune")[1].convert("-35"))
+        self.assertEqual(0.5, lookup_opcode("ampeg_release")[1].convert("0.5"))
+        self.assertEqual("a b.wav", lookup_opcode("sample")[1].convert("a b.wav"))
+
+    def test_convert_invalid(self):
+        with self.assertRaises(SfzInvalidOpcodeValueException):
+            lookup_opcode("hivel")[1].convert("loud")
+        with self.assertRaises(SfzInvalidOpcodeValueException):
+            lookup_opcode("hivel")[1].convert("128")
+        with self.assertRaises(SfzInvalidKeyException):
+            lookup_opcode("lokey")[1].convert("h4")
+
+    def test_get_level_opcodes(self):
+        self.assertEqual({"lovel", "hivel", "tune"}, get_level_opcodes(GROUP_LEVEL))
+        self.assertIn("loop_start", get_level_opcodes(REGION_LEVEL))
+        self.assertNotIn("loopstart", get_level_opcodes(REGION_LEVEL))
@@ -1,16 +1,19 @@
+import asyncio
 from unittest import TestCase
 from unittest.mock import patch
 import xml.etree.ElementTree as ET
 import xml.dom.minidom
 import os
 import shutil
-from nanostudio_2_sample_converter.formats.sfz.utils.audio import Audio
+from tempfile import TemporaryDirectory
+from pydub.audio_segment import AudioSegment
 from nanostudio_2_sample_converter.formats.sfz.sfz import (
     Sfz,
 )
 from nanostudio_2_sample_converter.formats.sfz.exceptions import (
     SfzDestinationException,
     SfzDoesNotExistException,
+    SfzNotConvertedException,
 )
 from tests.sfz.manifest import EXAMPLES
 
@@ -19,6 +22,7 @@ SFZ_PATH = os.path.join(DIR_PATH, "sample-files/examples/sfz/example_2.sfz")
 DESTINATION_PATH = os.path.join(DIR_PATH, "sample-files/examples/obsidian/actual")
 DESTINATION_PATCH = os.path.join(DESTINATION_PATH, "example_2.obs")
 DESTINATION_PATCH_PACKAGE = os.path.join(DESTINATION_PATCH, "Package.obs")
+TONE_PATH = os.path.join(DIR_PATH, "utils/wave_chunk_parser_extended/files/tone.wav")
 
 
 class TestSfz(TestCase):
@@ -39,20 +43,18 @@ class TestSfz(TestCase):
     @patch(
         "nanostudio_2_sample_converter.formats.sfz.sfz.Sfz._Sfz__create_destination_directory"
     )
-    @patch("nanostudio_2_sample_converter.formats.sfz.sfz.Sfz._Sfz__copy_audio_files")
-    @patch(
-        "nanostudio_2_sample_converter.formats.sfz.sfz.Sfz._Sfz__convert_audio_files_to_ns_audio_files"
-    )
+    @patch("nanostudio_2_sample_converter.formats.sfz.sfz.Sfz._Sfz__plan_audio_files")
+    @patch("nanostudio_2_sample_converter.formats.sfz.sfz.Sfz._Sfz__write_audio_files")
     @patch(
         "nanostudio_2_sample_converter.formats.sfz.sfz.Sfz._Sfz__update_sample_to_basename"
     )
     def test_sfz_to_xml(
-        self, mock_update, mock_convert, mock_copy, mock_create_destination_directory
+        self, mock_update, mock_write, mock_plan, mock_create_destination_directory
     ):
         mock_create_destination_directory.return_value = None
         mock_update.return_value = None
-        mock_convert.return_value = None
-        mock_copy.return_value = None
+        mock_write.return_value = None
+        mock_plan.return_value = None
         for example in EXAMPLES:
             xml_path = os.path.join(DIR_PATH, example["xml"])
             sfz_path = os.path.join(DIR_PATH, example["sfz"])
@@ -71,11 +73,111 @@ class TestSfz(TestCase):
             self.assertTrue(mock_create_destination_directory.called)
             self.assertEqual(sample_xml_pretty, sfz_xml_pretty)
 
+    def test_shared_samples(self):
+        with TemporaryDirectory() as directory:
+            samples_path = os.path.join(directory, "samples")
+            os.makedirs(samples_path)
+            for name in ["tone.wav", "copy.wav"]:
+                shutil.copyfile(TONE_PATH, os.path.join(samples_path, name))
+            sfz_path = os.path.join(directory, "shared.sfz")
+            with open(sfz_path, "w") as writer:
+                writer.write(
+                    "<group>\n"
+                    "<region> sample=samples/tone.wav offset=100 end=1000 key=60\n"
+                    "<region> sample=samples/tone.wav offset=100 end=1000 key=61\n"
+                    "<region> sample=samples/tone.wav offset=200 key=62\n"
+                    "<region> sample=samples/copy.wav key=63\n"
+                    "<region> sample=samples/tone.wav key=64\n"
+                    "<region> sample=SAMPLES\\Tone.WAV key=65\n"
+                )
+            sfz = Sfz(sfz_path, os.path.join(directory, "patch"), "obs")
+            asyncio.run(sfz.convert())
+            samples = [region.sample for region in sfz.sfz_headers.iter_regions()]
+            self.assertEqual(samples[0], samples[1])
+            self.assertEqual("tone.wav", samples[0])
+            self.assertRegex(samples[2], r"^tone-[0-9a-f]{8}\.wav$")
+            self.assertEqual(["copy.wav"] * 3, samples[3:])
+            self.assertEqual(
+                sorted(set(samples)),
+                sorted(os.listdir(os.path.join(directory, "patch", "shared.obs"))),
+            )
+
+    def test_sources_are_hashed_only_when_sizes_match(self):
+        with TemporaryDirectory() as directory:
+            shutil.copyfile(TONE_PATH, os.path.join(directory, "tone.wav"))
+            with open(TONE_PATH, "rb") as reader, open(
+                os.path.join(directory, "longer.wav"), "wb"
+            ) as writer:
+                writer.write(reader.read() + bytes(2))
+            sfz_path = os.path.join(directory, "sizes.sfz")
+            with open(sfz_path, "w") as writer:
+                writer.write(
+                    "<group>\n"
+                    "<region> sample=tone.wav key=60\n"
+                    "<region> sample=longer.wav key=61\n"
+                    "<region> sample=tone.wav key=62\n"
+                )
+            with patch(
+                "nanostudio_2_sample_converter.formats.sfz.sfz.hash_file"
+            ) as mock_hash_file:
+                sfz = Sfz(sfz_path, os.path.join(directory, "patch"), "obs")
+            self.assertFalse(mock_hash_file.called)
+            self.assertEqual(
+                ["tone.wav", "longer.wav", "tone.wav"],
+                [
+                    os.path.basename(region.sample)
+                    for region in sfz.sfz_headers.iter_regions()
+                ],
+            )
+
+    def test_velocity_layers_across_globals(self):
+        with TemporaryDirectory() as directory:
+            shutil.copyfile(TONE_PATH, os.path.join(directory, "tone.wav"))
+            sfz_path = os.path.join(directory, "layers.sfz")
+            with open(sfz_path, "w") as writer:
+                writer.write(
+                    "<global> loop_mode=loop_continuous\n"
+                    "<group> lovel=80 hivel=120\n<region> sample=tone.wav key=60\n"
+                    "<group> lovel=10 hivel=39\n<region> sample=tone.wav key=60\n"
+                    "<global> loop_mode=no_loop\n"
+                    "<group> lovel=40 hivel=79\n<region> sample=tone.wav key=60\n"
+                    "<group> lovel=50 hivel=90\n<region> sample=tone.wav key=60\n"
+                )
+            sfz = Sfz(sfz_path, os.path.join(directory, "patch"), "obs")
+            asyncio.run(sfz.convert())
+            groups = list(sfz.sfz_headers.iter_groups())
+            self.assertEqual(
+                [(0, 39), (40, 79), (80, 127)],
+                [(group.lovel, group.hivel) for group in groups],
+            )
+            self.assertEqual(
+                ["loop_continuous", "no_loop", "loop_continuous"],
+                [group.get_opcode("loop_mode") for group in groups],
+            )
+            self.assertIn(f'S3L1="{39 / 127}"', sfz.ns2_xml)
+            self.assertIn(f'S3L2="{80 / 127}"', sfz.ns2_xml)
+
+    def test_export_before_convert(self):
+        with TemporaryDirectory() as directory:
+            shutil.copyfile(TONE_PATH, os.path.join(directory, "tone.wav"))
+            sfz_path = os.path.join(directory, "tone.sfz")
+            with open(sfz_path, "w") as writer:
+                writer.write("<region> sample=tone.wav key=60\n")
+            sfz = Sfz(sfz_path, os.path.join(directory, "patch"), "obs")
+            with self.assertRaises(SfzNotConvertedException):
+                sfz.export()
+            self.assertFalse(
+                os.path.exists(
+                    os.path.join(directory, "patch", "tone.obs", "Package.obs")
+                )
+            )
+
     def test_full(self):
         if os.path.exists(DESTINATION_PATCH):
             shutil.rmtree(DESTINATION_PATCH)
         self.assertFalse(os.path.exists(DESTINATION_PATCH))
         sfz = Sfz(SFZ_PATH, DESTINATION_PATH, "obs")
+        asyncio.run(sfz.convert())
         self.assertTrue(os.path.exists(DESTINATION_PATCH))
         sfz.export()
         with open(DESTINATION_PATCH_PACKAGE) as sample_file:
@@ -97,11 +199,12 @@ class TestSfz(TestCase):
             "mf-taiko-v4.ogg",
         ]
         files = [os.path.join(DESTINATION_PATCH, file) for file in files]
-        files_length = [217984, 80000, 189824, 408960]
+        files_length = [217984, 160000, 189824, 408960]
         for index, file in enumerate(files):
             self.assertTrue(os.path.exists(file))
             self.assertEqual(
-                files_length[index], len(Audio(file).audio.get_array_of_samples())
+                files_length[index],
+                len(AudioSegment.from_file(file).get_array_of_samples()),
             )
 
         with open(files[1], "rb") as open_file:
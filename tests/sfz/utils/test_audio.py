@@ -1,8 +1,16 @@
 import os
+import wave
+from io import BytesIO
+from struct import pack
 from unittest import TestCase
 from nanostudio_2_sample_converter.formats.sfz.utils.audio import (
-    Audio,
-    add_loop_to_audio_data,
+    add_loop_in_place,
+    build_wav_data,
+    crop_wav_data,
+    has_loops,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.wave_chunk_parser_extended.chunks_extended import (
+    RiffChunkIndex,
 )
 
 DIR_PATH = os.path.dirname(os.path.realpath(__file__))
@@ -10,20 +18,72 @@ DIR_PATH = os.path.dirname(os.path.realpath(__file__))
 FILE_PATH = os.path.join(DIR_PATH, "./wave_chunk_parser_extended/files/tone.wav")
 
 
-class TestAudio(TestCase):
-    def test_crop_audio(self):
-        start = 10000
-        end = 20000
-        audio = Audio(FILE_PATH)
-        self.assertEqual(len(audio.audio.raw_data), 75172)
-        audio.crop_audio(start, end)
-        self.assertEqual(len(audio.audio.raw_data), 20000)
+class TestWavCrop(TestCase):
+    def setUp(self):
+        buffer = BytesIO()
+        with wave.open(buffer, "wb") as writer:
+            writer.setnchannels(2)
+            writer.setsampwidth(2)
+            writer.setframerate(44100)
+            writer.writeframes(
+                b"".join(pack("<hh", frame, -frame) for frame in range(100))
+            )
+        self.riff_index = RiffChunkIndex(buffer)
+        self.addCleanup(self.riff_index.close)
+
+    def test_crop_wav_data_on_frame_boundaries(self):
+        format_chunk, frames = crop_wav_data(self.riff_index, 10, 20)
+        self.assertEqual(b"fmt ", bytes(format_chunk[:4]))
+        self.assertEqual(
+            b"".join(pack("<hh", frame, -frame) for frame in range(10, 20)),
+            bytes(frames),
+        )
+        self.assertEqual(400, len(crop_wav_data(self.riff_index)[1]))
+        self.assertEqual(40, len(crop_wav_data(self.riff_index, 90, 1000)[1]))
+
+    def test_build_wav_data(self):
+        format_chunk, frames = crop_wav_data(self.riff_index, 10, 20)
+        with wave.open(
+            BytesIO(b"".join(build_wav_data(format_chunk, frames)))
+        ) as reader:
+            self.assertEqual(2, reader.getnchannels())
+            self.assertEqual(10, reader.getnframes())
+            self.assertEqual(bytes(frames), reader.readframes(10))
+
+
+class TestHasLoops(TestCase):
+    def create_riff_index(self, loops):
+        buffer = BytesIO()
+        with wave.open(buffer, "wb") as writer:
+            writer.setnchannels(1)
+            writer.setsampwidth(2)
+            writer.setframerate(44100)
+            writer.writeframes(bytes(200))
+        sample_chunk = pack("<9I", 0, 0, 22675, 60, 0, 0, 0, len(loops), 0)
+        for loop_start, loop_end in loops:
+            sample_chunk += pack("<6I", 0, 0, loop_start, loop_end, 0, 0)
+        data = buffer.getvalue() + pack("<4sI", b"smpl", len(sample_chunk))
+        data += sample_chunk
+        data = data[:4] + pack("<I", len(data) - 8) + data[8:]
+        riff_index = RiffChunkIndex(BytesIO(data))
+        self.addCleanup(riff_index.close)
+        return riff_index
+
+    def test_sample_chunk_without_loops(self):
+        self.assertFalse(has_loops(self.create_riff_index([])))
+
+    def test_sample_chunk_with_loops(self):
+        self.assertTrue(has_loops(self.create_riff_index([(10, 50)])))
+        self.assertFalse(has_loops(self.create_riff_index([(10, 10)])))
 
 
 class TestLoop(TestCase):
-    def test_add_loop_to_audio_data(self):
+    def test_add_loop_in_place(self):
         with open(FILE_PATH, "rb") as file:
-            result = add_loop_to_audio_data(file, 10000, 20000)
+            buffer = BytesIO(file.read())
+        with RiffChunkIndex(buffer) as riff_index:
+            add_loop_in_place(riff_index, 10000, 20000)
+        result = buffer.getvalue()
         expected_smpl_binary = (
             b"smpl<\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x93X\x00\x00<\x00\x00\x00"
             b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00"
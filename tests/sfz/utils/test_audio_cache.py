@@ -0,0 +1,101 @@
+import asyncio
+import os
+import shutil
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+from nanostudio_2_sample_converter.formats.sfz.utils.audio_cache import AudioCache
+from nanostudio_2_sample_converter.formats.sfz.utils.ffmpeg import (
+    FfmpegScheduler,
+    Transcode,
+    create_batch_command,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.sample_plan import (
+    SampleEdit,
+    SamplePlan,
+    execute_sample_plans,
+)
+
+DIR_PATH = os.path.dirname(os.path.realpath(__file__))
+
+FILE_PATH = os.path.join(DIR_PATH, "./wave_chunk_parser_extended/files/tone.wav")
+
+
+class TestAudioCache(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.audio_cache = AudioCache(
+            os.path.join(self.directory.name, "cache"), 1024 * 1024
+        )
+        self.source = os.path.join(self.directory.name, "tone.flac")
+        asyncio.run(
+            FfmpegScheduler().run_batch([Transcode(FILE_PATH, self.source, "flac")])
+        )
+
+    def create_sample_plans(self, destination_directory):
+        os.makedirs(destination_directory, exist_ok=True)
+        return [
+            SamplePlan(
+                self.source,
+                os.path.join(destination_directory, "cropped.flac"),
+                SampleEdit(offset=100, end=1000),
+            ),
+            SamplePlan(
+                self.source,
+                os.path.join(destination_directory, "looped.flac"),
+                SampleEdit(loop_start=10, loop_end=20),
+            ),
+        ]
+
+    def test_create_key(self):
+        sample_plan = SamplePlan(self.source, "a.flac", SampleEdit(offset=100))
+        key = AudioCache.create_key(sample_plan)
+        self.assertEqual(
+            key,
+            AudioCache.create_key(SamplePlan(self.source, "b.flac", SampleEdit(100))),
+        )
+        self.assertNotEqual(
+            key,
+            AudioCache.create_key(
+                SamplePlan(self.source, "a.flac", SampleEdit(offset=101))
+            ),
+        )
+        self.assertNotEqual(
+            key,
+            AudioCache.create_key(
+                SamplePlan(self.source, "a.flac", SampleEdit(100, loop_end=10))
+            ),
+        )
+        changed_source = os.path.join(self.directory.name, "changed.flac")
+        shutil.copyfile(self.source, changed_source)
+        with open(changed_source, "ab") as writer:
+            writer.write(b"\x00")
+        self.assertNotEqual(
+            key,
+            AudioCache.create_key(
+                SamplePlan(changed_source, "a.flac", SampleEdit(offset=100))
+            ),
+        )
+
+    def test_unchanged_samples_are_not_decoded_again(self):
+        first_run = self.create_sample_plans(os.path.join(self.directory.name, "1"))
+        second_run = self.create_sample_plans(os.path.join(self.directory.name, "2"))
+        with patch(
+            "nanostudio_2_sample_converter.formats.sfz.utils.ffmpeg.create_batch_command",
+            wraps=create_batch_command,
+        ) as mock_create_batch_command:
+            self.assertEqual(
+                asyncio.run(
+                    execute_sample_plans(first_run, audio_cache=self.audio_cache)
+                ),
+                asyncio.run(
+                    execute_sample_plans(second_run, audio_cache=self.audio_cache)
+                ),
+            )
+        self.assertEqual(1, mock_create_batch_command.call_count)
+        for first_plan, second_plan in zip(first_run, second_run):
+            with open(first_plan.destination, "rb") as first, open(
+                second_plan.destination, "rb"
+            ) as second:
+                self.assertEqual(first.read(), second.read())
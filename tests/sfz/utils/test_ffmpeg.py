@@ -0,0 +1,159 @@
+import asyncio
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+from pydub.audio_segment import AudioSegment
+from nanostudio_2_sample_converter.formats.sfz.exceptions import (
+    FfmpegDecodeException,
+    FfmpegNotInstalledException,
+    FfmpegTimeoutException,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.probe import AudioInfo
+from nanostudio_2_sample_converter.formats.sfz.utils.ffmpeg import (
+    BITEXACT_ARGUMENTS,
+    WAV_CODEC,
+    FfmpegScheduler,
+    Transcode,
+    create_batch_command,
+    get_wav_codec,
+    iter_batches,
+)
+
+DIR_PATH = os.path.dirname(os.path.realpath(__file__))
+
+FILE_PATH = os.path.join(DIR_PATH, "./wave_chunk_parser_extended/files/tone.wav")
+
+
+def run_batch(transcodes, timeout=None):
+    asyncio.run(FfmpegScheduler(timeout=timeout).run_batch(transcodes))
+
+
+class TestFfmpeg(TestCase):
+    def test_create_batch_command(self):
+        command = create_batch_command(
+            [
+                Transcode("a.ogg", "a.wav", "wav", (10, 20)),
+                Transcode("b.flac", "b.flac", "flac", (None, 5)),
+            ]
+        )
+        self.assertEqual(["-i", "a.ogg", "-i", "b.flac"], command[6:10])
+        self.assertEqual(
+            ["-map", "0:a:0"]
+            + BITEXACT_ARGUMENTS
+            + [
+                "-af",
+                "atrim=start_sample=10:end_sample=20,asetpts=PTS-STARTPTS",
+                "-c:a",
+                "pcm_s32le",
+                "-f",
+                "wav",
+                "a.wav",
+                "-map",
+                "1:a:0",
+            ]
+            + BITEXACT_ARGUMENTS
+            + [
+                "-af",
+                "atrim=start_sample=0:end_sample=5,asetpts=PTS-STARTPTS",
+                "-f",
+                "flac",
+                "b.flac",
+            ],
+            command[10:],
+        )
+
+    def test_get_wav_codec(self):
+        self.assertEqual("pcm_s24le", get_wav_codec(AudioInfo("flac", 48000, 2, 24)))
+        self.assertEqual(WAV_CODEC, get_wav_codec(AudioInfo("ogg", 44100, 2)))
+        self.assertEqual(
+            WAV_CODEC, get_wav_codec(AudioInfo("aiff", 44100, 2, 64, is_float=True))
+        )
+
+    def test_iter_batches(self):
+        self.assertEqual([[0, 1], [2, 3], [4]], list(iter_batches(list(range(5)), 2)))
+
+    def test_run_batch(self):
+        with TemporaryDirectory() as directory:
+            transcodes = [
+                Transcode(
+                    FILE_PATH,
+                    os.path.join(directory, f"{index}.flac"),
+                    "flac",
+                    (index, 50 + index),
+                )
+                for index in range(3)
+            ]
+            with patch(
+                "nanostudio_2_sample_converter.formats.sfz.utils.ffmpeg.create_batch_command",
+                wraps=create_batch_command,
+            ) as mock_create_batch_command:
+                run_batch(transcodes)
+            self.assertEqual(1, mock_create_batch_command.call_count)
+            for transcode in transcodes:
+                self.assertEqual(
+                    50, AudioSegment.from_file(transcode.destination).frame_count()
+                )
+
+    def test_failing_file_is_reported(self):
+        with TemporaryDirectory() as directory:
+            invalid_path = os.path.join(directory, "invalid.ogg")
+            with open(invalid_path, "wb") as writer:
+                writer.write(b"not audio")
+            with self.assertRaises(FfmpegDecodeException) as context:
+                run_batch(
+                    [
+                        Transcode(FILE_PATH, os.path.join(directory, "a.flac"), "flac"),
+                        Transcode(
+                            invalid_path, os.path.join(directory, "b.wav"), "wav"
+                        ),
+                    ]
+                )
+            self.assertIn(invalid_path, context.exception.args[0])
+            self.assertTrue(os.path.exists(os.path.join(directory, "a.flac")))
+
+    def test_ffmpeg_not_installed(self):
+        with patch(
+            "nanostudio_2_sample_converter.formats.sfz.utils.ffmpeg.asyncio.create_subprocess_exec",
+            side_effect=FileNotFoundError,
+        ):
+            with self.assertRaises(FfmpegNotInstalledException):
+                run_batch([Transcode("a.ogg", "a.wav", "wav")])
+
+
+@skipUnless(hasattr(os, "mkfifo"), "named pipes are not supported.")
+class TestFfmpegScheduler(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.fifo_path = os.path.join(self.directory.name, "hung.wav")
+        os.mkfifo(self.fifo_path)
+
+    def test_timeout(self):
+        destination = os.path.join(self.directory.name, "a.flac")
+        with self.assertRaises(FfmpegTimeoutException) as context:
+            run_batch(
+                [
+                    Transcode(FILE_PATH, destination, "flac"),
+                    Transcode(self.fifo_path, destination + ".wav", "wav"),
+                ],
+                timeout=0.5,
+            )
+        self.assertIn(self.fifo_path, context.exception.args[0])
+        self.assertTrue(os.path.exists(destination))
+
+    def test_cancellation(self):
+        async def cancel():
+            scheduler = FfmpegScheduler()
+            task = asyncio.ensure_future(
+                scheduler.run_batch(
+                    [Transcode(self.fifo_path, self.fifo_path + ".wav", "wav")]
+                )
+            )
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await asyncio.wait_for(task, 5)
+            self.assertFalse(scheduler.semaphore.locked())
+
+        asyncio.run(cancel())
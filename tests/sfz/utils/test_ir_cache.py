@@ -0,0 +1,94 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from lxml import etree as ET
+from nanostudio_2_sample_converter.formats.sfz.headers import Region
+from nanostudio_2_sample_converter.formats.sfz.utils.ir_cache import (
+    IrCache,
+    encode_headers,
+    decode_headers,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.preprocessor import (
+    preprocess_file,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.tree_builder import build_tree
+
+
+class TestIrCache(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.ir_cache = IrCache(os.path.join(self.directory.name, "cache"), 1024 * 1024)
+
+    def write_file(self, file_name, sfz_string):
+        file_path = os.path.join(self.directory.name, file_name)
+        with open(file_path, "w", encoding="utf-8") as writer:
+            writer.write(sfz_string)
+        return file_path
+
+    def parse(self, sfz_path):
+        included_paths = []
+        sfz_headers = build_tree(preprocess_file(sfz_path, included_paths))
+        return sfz_headers, included_paths
+
+    def test_encode_and_decode(self):
+        sfz_path = self.write_file(
+            "a.sfz",
+            "<control> default_path=samples/ <group> lovel=0 hivel=63 tune=-5\n"
+            "<region> sample=a.wav key=60 <region> sample=b.wav lokey=61 hikey=62",
+        )
+        sfz_headers, _ = self.parse(sfz_path)
+        decoded_headers = decode_headers(encode_headers(sfz_headers))
+        self.assertEqual(
+            ET.tostring(sfz_headers.to_xml()), ET.tostring(decoded_headers.to_xml())
+        )
+        region = list(decoded_headers.iter_regions())[0]
+        self.assertIsInstance(region, Region)
+        self.assertEqual("samples/", region.get_opcode("default_path"))
+
+    def test_store_and_load(self):
+        sfz_path = self.write_file("a.sfz", "<region> sample=a.wav key=60")
+        key = self.ir_cache.create_key(sfz_path)
+        self.assertIsNone(self.ir_cache.load(key))
+        sfz_headers, included_paths = self.parse(sfz_path)
+        self.ir_cache.store(key, included_paths, sfz_headers)
+        self.assertEqual(
+            ET.tostring(sfz_headers.to_xml()),
+            ET.tostring(self.ir_cache.load(key).to_xml()),
+        )
+        self.write_file("a.sfz", "<region> sample=a.wav key=61")
+        self.assertNotEqual(key, self.ir_cache.create_key(sfz_path))
+
+    def test_changed_include_is_a_miss(self):
+        self.write_file("map.sfz", "<region> sample=a.wav key=60")
+        sfz_path = self.write_file("a.sfz", '<group> lovel=0 #include "map.sfz"')
+        key = self.ir_cache.create_key(sfz_path)
+        sfz_headers, included_paths = self.parse(sfz_path)
+        self.assertEqual([os.path.join(self.directory.name, "map.sfz")], included_paths)
+        self.ir_cache.store(key, included_paths, sfz_headers)
+        self.assertIsNotNone(self.ir_cache.load(key))
+        self.write_file("map.sfz", "<region> sample=a.wav key=61")
+        self.assertIsNone(self.ir_cache.load(key))
+
+    def test_same_sfz_text_with_different_includes(self):
+        keys = []
+        for library, key in [("a", 60), ("b", 72)]:
+            os.makedirs(os.path.join(self.directory.name, library))
+            self.write_file(
+                os.path.join(library, "map.sfz"), f"<region> sample=a.wav key={key}"
+            )
+            sfz_path = self.write_file(
+                os.path.join(library, "instrument.sfz"),
+                '<group> lovel=0 #include "map.sfz"',
+            )
+            keys.append(self.ir_cache.create_key(sfz_path))
+            self.assertIsNone(self.ir_cache.load(keys[-1]))
+            sfz_headers, included_paths = self.parse(sfz_path)
+            self.ir_cache.store(keys[-1], included_paths, sfz_headers)
+        self.assertNotEqual(keys[0], keys[1])
+        region = list(self.ir_cache.load(keys[1]).iter_regions())[0]
+        self.assertEqual(72, region.get_opcode("key"))
+
+    def test_corrupt_entry_is_a_miss(self):
+        self.ir_cache.disk_cache.put("key", b"not a cache entry")
+        self.assertIsNone(self.ir_cache.load("key"))
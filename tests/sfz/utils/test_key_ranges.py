@@ -0,0 +1,73 @@
+from unittest import TestCase
+from nanostudio_2_sample_converter.formats.sfz.headers import Region
+from nanostudio_2_sample_converter.formats.sfz.utils.key_ranges import (
+    KeyRangeIndex,
+    get_key_range,
+)
+
+
+def create_chromatic_regions(lowest_key, highest_key):
+    return [
+        Region(
+            {
+                "sample": f"{key}.wav",
+                "lokey": key,
+                "hikey": key,
+                "pitch_keycenter": key,
+            }
+        )
+        for key in range(lowest_key, highest_key + 1)
+    ]
+
+
+class TestKeyRanges(TestCase):
+    def test_get_key_range_defaults(self):
+        self.assertEqual((0, 127, 63), get_key_range(Region({"sample": "a.wav"})))
+        self.assertEqual(
+            (10, 20, 12),
+            get_key_range(Region({"lokey": 10, "hikey": 20, "pitch_keycenter": 12})),
+        )
+
+    def test_reduce_under_limit_unchanged(self):
+        regions = create_chromatic_regions(60, 70)
+        self.assertEqual(regions, KeyRangeIndex(regions).reduce(32))
+        self.assertEqual(60, regions[0].lokey)
+        self.assertEqual(60, regions[0].hikey)
+
+    def test_reduce_covers_keyboard(self):
+        regions = create_chromatic_regions(21, 108)
+        reduced = KeyRangeIndex(regions).reduce(32)
+        self.assertEqual(32, len(reduced))
+        self.assertEqual(21, reduced[0].pitch_keycenter)
+        self.assertEqual(108, reduced[-1].pitch_keycenter)
+        covered_keys = []
+        for region in reduced:
+            self.assertLessEqual(region.lokey, region.pitch_keycenter)
+            self.assertGreaterEqual(region.hikey, region.pitch_keycenter)
+            covered_keys.extend(range(region.lokey, region.hikey + 1))
+        self.assertEqual(list(range(21, 109)), covered_keys)
+        roots = [region.pitch_keycenter for region in reduced]
+        self.assertLessEqual(max(b - a for a, b in zip(roots, roots[1:])), 3)
+
+    def test_reduce_keeps_document_order(self):
+        regions = list(reversed(create_chromatic_regions(0, 63)))
+        reduced = KeyRangeIndex(regions).reduce(8)
+        roots = [region.pitch_keycenter for region in reduced]
+        self.assertEqual(sorted(roots, reverse=True), roots)
+
+    def test_reduce_drops_duplicate_roots_first(self):
+        regions = create_chromatic_regions(60, 62) + create_chromatic_regions(61, 61)
+        reduced = KeyRangeIndex(regions).reduce(3)
+        self.assertEqual([60, 61, 62], sorted(r.pitch_keycenter for r in reduced))
+
+    def test_reduce_large(self):
+        regions = [
+            Region(
+                {"lokey": key % 128, "hikey": key % 128, "pitch_keycenter": key % 128}
+            )
+            for key in range(20000)
+        ]
+        reduced = KeyRangeIndex(regions).reduce(32)
+        self.assertEqual(32, len(reduced))
+        self.assertEqual(0, min(region.lokey for region in reduced))
+        self.assertEqual(127, max(region.hikey for region in reduced))
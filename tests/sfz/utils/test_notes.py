@@ -0,0 +1,37 @@
+from unittest import TestCase
+from nanostudio_2_sample_converter.formats.sfz.exceptions import SfzInvalidKeyException
+from nanostudio_2_sample_converter.formats.sfz.utils.notes import (
+    KEY_NUMBERS,
+    convert_key_string_to_key_number,
+)
+
+
+class TestNotes(TestCase):
+    def test_key_numbers(self):
+        self.assertEqual(0, convert_key_string_to_key_number("c-1"))
+        self.assertEqual(60, convert_key_string_to_key_number("c4"))
+        self.assertEqual(69, convert_key_string_to_key_number("a4"))
+        self.assertEqual(127, convert_key_string_to_key_number("g9"))
+        self.assertEqual(0, convert_key_string_to_key_number("0"))
+        self.assertEqual(127, convert_key_string_to_key_number("127"))
+
+    def test_accidentals_and_case(self):
+        for string in ["c#4", "C#4", "db4", "Db4", "DB4"]:
+            self.assertEqual(61, convert_key_string_to_key_number(string))
+        self.assertEqual(59, convert_key_string_to_key_number("cb4"))
+        self.assertEqual(60, convert_key_string_to_key_number("b#3"))
+
+    def test_every_key_has_a_name(self):
+        self.assertEqual(
+            set(range(128)),
+            {
+                key_number
+                for (name, key_number) in KEY_NUMBERS.items()
+                if name[0].isalpha()
+            },
+        )
+
+    def test_invalid_keys(self):
+        for string in ["h4", "c10", "g#9", "cb-1", "128", "-1", "c", "", "c#4x"]:
+            with self.assertRaises(SfzInvalidKeyException):
+                convert_key_string_to_key_number(string)
@@ -0,0 +1,132 @@
+from unittest import TestCase
+from nanostudio_2_sample_converter.formats.sfz.headers import (
+    Control,
+    Global,
+    Group,
+    Region,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.passes import (
+    Pass,
+    PassManager,
+    HEADER_SCOPE,
+    ALL_OPCODES,
+    STRUCTURE,
+)
+
+
+def add_opcode(opcode):
+    def add(header):
+        header.opcodes[opcode] = len(header.opcodes)
+
+    return add
+
+
+class TestPassManager(TestCase):
+    def setUp(self):
+        self.control = Control(
+            {}, [Global({}, [Group({}, [Region(), Region()]), Group({}, [Region()])])]
+        )
+
+    def test_fuse_header_passes(self):
+        passes = [
+            Pass("a", add_opcode("a"), writes=["a"], scope=HEADER_SCOPE),
+            Pass("b", add_opcode("b"), writes=["b"], scope=HEADER_SCOPE),
+            Pass("tree", lambda headers: None, reads=["c"], writes=["e"]),
+            Pass("d", add_opcode("d"), writes=["d"], scope=HEADER_SCOPE),
+            Pass("c", add_opcode("c"), writes=["c"], scope=HEADER_SCOPE),
+        ]
+        stages = PassManager.fuse(passes)
+        self.assertEqual(
+            [["a", "b", "d"], ["tree"], ["c"]],
+            [[sfz_pass.name for sfz_pass in stage] for stage in stages],
+        )
+
+    def test_structure_pass_blocks_fusion(self):
+        passes = [
+            Pass("a", add_opcode("a"), writes=["a"], scope=HEADER_SCOPE),
+            Pass("tree", lambda headers: None, writes=[STRUCTURE]),
+            Pass("b", add_opcode("b"), writes=["b"], scope=HEADER_SCOPE),
+            Pass("c", add_opcode("c"), writes=["c"], scope=HEADER_SCOPE),
+        ]
+        stages = PassManager.fuse(passes)
+        self.assertEqual(
+            [["a"], ["tree"], ["b", "c"]],
+            [[sfz_pass.name for sfz_pass in stage] for stage in stages],
+        )
+
+    def test_structure_pass_runs_before_later_header_passes(self):
+        def remove_second_group(headers):
+            headers.children[0].children.pop()
+
+        pass_manager = PassManager(
+            [
+                Pass("a", add_opcode("a"), writes=["a"], scope=HEADER_SCOPE),
+                Pass("tree", remove_second_group, writes=[STRUCTURE]),
+                Pass(
+                    "b",
+                    add_opcode("b"),
+                    writes=["b"],
+                    scope=(Group,),
+                ),
+            ]
+        )
+        removed_group = self.control.children[0].children[1]
+        pass_manager.run(self.control)
+        self.assertEqual({"a": 0}, removed_group.opcodes)
+
+    def test_tree_pass_blocks_fusion(self):
+        passes = [
+            Pass("a", add_opcode("a"), writes=["a"], scope=HEADER_SCOPE),
+            Pass("tree", lambda headers: None, writes=[ALL_OPCODES]),
+            Pass("b", add_opcode("b"), writes=["b"], scope=HEADER_SCOPE),
+        ]
+        self.assertEqual(3, len(PassManager.fuse(passes)))
+
+    def test_run_preserves_pass_order_per_header(self):
+        pass_manager = PassManager(
+            [
+                Pass("a", add_opcode("a"), writes=["a"], scope=HEADER_SCOPE),
+                Pass(
+                    "b",
+                    add_opcode("b"),
+                    writes=["b"],
+                    scope=(Region,),
+                ),
+            ]
+        )
+        pass_manager.run(self.control)
+        self.assertEqual(1, len(pass_manager.stages))
+        for header in self.control.iter():
+            if isinstance(header, Region):
+                self.assertEqual({"a": 0, "b": 1}, header.opcodes)
+            else:
+                self.assertEqual({"a": 0}, header.opcodes)
+
+    def test_timings_report(self):
+        pass_manager = PassManager(
+            [
+                Pass("a", add_opcode("a"), writes=["a"], scope=HEADER_SCOPE),
+                Pass("b", add_opcode("b"), writes=["b"], scope=HEADER_SCOPE),
+                Pass("tree", lambda headers: None),
+            ]
+        )
+        pass_manager.run(self.control)
+        self.assertEqual(2, len(pass_manager.timings))
+        lines = pass_manager.report().splitlines()
+        self.assertTrue(lines[0].startswith(" 0 a") and lines[0].endswith(" ms"))
+        self.assertEqual(" 0 b", lines[1].rstrip())
+        self.assertTrue(lines[2].startswith(" 1 tree") and lines[2].endswith(" ms"))
+        self.assertEqual("2 stages, 3 passes", lines[3])
+        self.assertNotIn("cached", "\n".join(lines))
+
+    def test_timings_report_without_run(self):
+        pass_manager = PassManager(
+            [
+                Pass("a", add_opcode("a"), writes=["a"], scope=HEADER_SCOPE),
+                Pass("tree", lambda headers: None),
+            ]
+        )
+        lines = pass_manager.report().splitlines()
+        self.assertEqual(4, len(lines))
+        for line in lines[:2] + lines[3:]:
+            self.assertTrue(line.endswith("cached"))
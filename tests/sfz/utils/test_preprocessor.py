@@ -0,0 +1,100 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+from nanostudio_2_sample_converter.formats.sfz.exceptions import (
+    SfzIncludeDoesNotExistException,
+    SfzRecursiveIncludeException,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils import preprocessor
+from nanostudio_2_sample_converter.formats.sfz.utils.preprocessor import (
+    preprocess_file,
+    substitute_variables,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.tokenizer import (
+    HEADER_TOKEN,
+    OPCODE_TOKEN,
+)
+
+
+class TestPreprocessor(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_file(self, file_name, sfz_string):
+        file_path = os.path.join(self.directory.name, file_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as writer:
+            writer.write(sfz_string)
+        return file_path
+
+    def test_substitute_variables(self):
+        defines = {"$KEY": "60", "$KEYS": "61"}
+        self.assertEqual("60", substitute_variables("$KEY", defines))
+        self.assertEqual("a61/b", substitute_variables("a$KEYS/b", defines))
+        self.assertEqual("$OTHER", substitute_variables("$OTHER", defines))
+        self.assertEqual("c4", substitute_variables("c4", {}))
+
+    def test_include_and_define(self):
+        self.write_file("mappings/map.sfz", "<region> sample=$PATH/a.wav key=$KEY\n")
+        sfz_path = self.write_file(
+            "instrument.sfz",
+            "#define $PATH samples\n#define $KEY 60\n<group> lovel=0\n"
+            '#include "mappings\\map.sfz"\n#define $KEY 62\n#include "mappings/map.sfz"',
+        )
+        self.assertEqual(
+            [
+                (HEADER_TOKEN, "group", None),
+                (OPCODE_TOKEN, "lovel", "0"),
+                (HEADER_TOKEN, "region", None),
+                (OPCODE_TOKEN, "sample", "samples/a.wav"),
+                (OPCODE_TOKEN, "key", "60"),
+                (HEADER_TOKEN, "region", None),
+                (OPCODE_TOKEN, "sample", "samples/a.wav"),
+                (OPCODE_TOKEN, "key", "62"),
+            ],
+            list(preprocess_file(sfz_path)),
+        )
+
+    def test_includes_are_tokenized_once(self):
+        self.write_file("map.sfz", "<region> sample=a.wav")
+        sfz_paths = [
+            self.write_file(f"articulation_{index}.sfz", '#include "map.sfz"')
+            for index in range(3)
+        ]
+        with patch.object(
+            preprocessor, "tokenize_file", wraps=preprocessor.tokenize_file
+        ) as tokenize_file:
+            for sfz_path in sfz_paths:
+                list(preprocess_file(sfz_path))
+        tokenized_paths = [call.args[0] for call in tokenize_file.call_args_list]
+        self.assertEqual(1, sum(path.endswith("map.sfz") for path in tokenized_paths))
+
+    def test_modified_include_is_tokenized_again(self):
+        include_path = self.write_file("map.sfz", "<region> sample=a.wav")
+        sfz_path = self.write_file("instrument.sfz", '#include "map.sfz"')
+        list(preprocess_file(sfz_path))
+        self.write_file("map.sfz", "<region> sample=b.wav")
+        os.utime(include_path, ns=(0, os.stat(include_path).st_mtime_ns + 1000))
+        self.assertIn(
+            (OPCODE_TOKEN, "sample", "b.wav"), list(preprocess_file(sfz_path))
+        )
+
+    def test_include_cache_is_bounded(self):
+        self.assertEqual(
+            preprocessor.INCLUDE_CACHE_SIZE,
+            preprocessor.tokenize_include_version.cache_parameters()["maxsize"],
+        )
+
+    def test_missing_include(self):
+        sfz_path = self.write_file("instrument.sfz", '#include "missing.sfz"')
+        with self.assertRaises(SfzIncludeDoesNotExistException):
+            list(preprocess_file(sfz_path))
+
+    def test_recursive_include(self):
+        self.write_file("a.sfz", '#include "b.sfz"')
+        self.write_file("b.sfz", '#include "a.sfz"')
+        sfz_path = self.write_file("instrument.sfz", '#include "a.sfz"')
+        with self.assertRaises(SfzRecursiveIncludeException):
+            list(preprocess_file(sfz_path))
@@ -0,0 +1,89 @@
+import asyncio
+import os
+from io import BytesIO
+from struct import pack
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from nanostudio_2_sample_converter.formats.sfz.exceptions import AudioProbeException
+from nanostudio_2_sample_converter.formats.sfz.utils.ffmpeg import (
+    FfmpegScheduler,
+    Transcode,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.probe import (
+    AIFF,
+    FLAC,
+    OGG,
+    WAV,
+    AudioInfo,
+    probe,
+    probe_file,
+    read_extended,
+)
+
+DIR_PATH = os.path.dirname(os.path.realpath(__file__))
+
+FILE_PATH = os.path.join(DIR_PATH, "./wave_chunk_parser_extended/files/tone.wav")
+
+FRAME_COUNT = 37586
+
+
+class TestProbe(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = TemporaryDirectory()
+        cls.paths = {
+            audio_format: os.path.join(cls.directory.name, f"tone.{audio_format}")
+            for audio_format in [FLAC, AIFF]
+        }
+        asyncio.run(
+            FfmpegScheduler().run_batch(
+                [
+                    Transcode(FILE_PATH, path, audio_format)
+                    for audio_format, path in cls.paths.items()
+                ]
+            )
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_wav(self):
+        self.assertEqual(AudioInfo(WAV, 44100, 1, 16, FRAME_COUNT), probe(FILE_PATH))
+
+    def test_flac(self):
+        self.assertEqual(
+            AudioInfo(FLAC, 44100, 1, 16, FRAME_COUNT), probe(self.paths[FLAC])
+        )
+
+    def test_flac_after_id3_tag(self):
+        with open(self.paths[FLAC], "rb") as reader:
+            data = b"ID3\x04\x00\x00\x00\x00\x00\x05" + bytes(5) + reader.read()
+        self.assertEqual(
+            AudioInfo(FLAC, 44100, 1, 16, FRAME_COUNT), probe_file(BytesIO(data))
+        )
+
+    def test_aiff(self):
+        audio_info = probe(self.paths[AIFF])
+        self.assertEqual(AudioInfo(AIFF, 44100, 1, 16, FRAME_COUNT), audio_info)
+        self.assertAlmostEqual(FRAME_COUNT / 44100, audio_info.duration)
+
+    def test_ogg(self):
+        sample_path = os.path.join(
+            DIR_PATH, "..", "sample-files", "examples", "sfz", "samples"
+        )
+        audio_info = probe(os.path.join(sample_path, "mf-taiko-v1.ogg"))
+        self.assertEqual(AudioInfo(OGG, 44100, 2, None, 108826), audio_info)
+        self.assertTrue(audio_info.is_lossy)
+
+    def test_read_extended(self):
+        self.assertEqual(44100, read_extended(pack(">HQ", 0x400E, 0xAC44 << 48)))
+        self.assertEqual(0, read_extended(bytes(10)))
+
+    def test_unsupported_format(self):
+        with self.assertRaises(AudioProbeException):
+            probe_file(BytesIO(b"not audio at all"))
+        with self.assertRaises(AudioProbeException):
+            probe_file(BytesIO(b"OggS" + bytes(40)))
+        with self.assertRaises(AudioProbeException):
+            probe_file(BytesIO(b"FORM\x00\x00\x00\x20AIFFCOMM\x00\x00\x00\x12"))
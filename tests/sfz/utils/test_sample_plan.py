@@ -0,0 +1,170 @@
+import asyncio
+import os
+import shutil
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+from pydub.audio_segment import AudioSegment
+from nanostudio_2_sample_converter.formats.sfz.utils.ffmpeg import (
+    FfmpegScheduler,
+    Transcode,
+    create_batch_command,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.probe import probe
+from nanostudio_2_sample_converter.formats.sfz.utils.sample_plan import (
+    SampleEdit,
+    SamplePlan,
+    execute_sample_plans,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.wave_chunk_parser_extended.chunks_extended import (
+    RiffChunkExtended,
+)
+from nanostudio_2_sample_converter.utils.file_copy import LINK_MODE_HARDLINK
+
+DIR_PATH = os.path.dirname(os.path.realpath(__file__))
+
+FILE_PATH = os.path.join(DIR_PATH, "./wave_chunk_parser_extended/files/tone.wav")
+
+
+class TestSamplePlan(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.destination = os.path.join(self.directory.name, "tone.wav")
+
+    def test_copy(self):
+        sample_plan = SamplePlan(FILE_PATH, self.destination)
+        self.assertFalse(sample_plan.is_cropped or sample_plan.is_looped)
+        with patch(
+            "nanostudio_2_sample_converter.formats.sfz.utils.ffmpeg.create_batch_command"
+        ) as mock_create_batch_command:
+            sample_plan.execute()
+        self.assertFalse(mock_create_batch_command.called)
+        with open(FILE_PATH, "rb") as source, open(self.destination, "rb") as copy:
+            self.assertEqual(source.read(), copy.read())
+
+    def test_crop_and_loop(self):
+        sample_plan = SamplePlan(
+            FILE_PATH,
+            self.destination,
+            SampleEdit(offset=10000, end=20000, loop_start=12000, loop_end=18000),
+        )
+        self.assertTrue(sample_plan.execute())
+        self.assertEqual(20000, len(AudioSegment.from_file(self.destination).raw_data))
+        with open(self.destination, "rb") as reader:
+            sample_chunk = RiffChunkExtended.from_file(reader).sub_chunks[
+                RiffChunkExtended.CHUNK_SAMPLE
+            ]
+        self.assertEqual(2000, sample_chunk.first_loop_start)
+        self.assertEqual(8000, sample_chunk.first_loop_end)
+
+    def test_loop_without_crop(self):
+        sample_plan = SamplePlan(
+            FILE_PATH, self.destination, SampleEdit(loop_start=100, loop_end=200)
+        )
+        self.assertTrue(sample_plan.execute())
+        with open(FILE_PATH, "rb") as source, open(self.destination, "rb") as copy:
+            source_data = source.read()
+            data = copy.read()
+        self.assertEqual(len(source_data), len(data))
+        self.assertEqual(source_data[:75216], data[:75216])
+        with open(self.destination, "rb") as reader:
+            sample_chunk = RiffChunkExtended.from_file(reader).sub_chunks[
+                RiffChunkExtended.CHUNK_SAMPLE
+            ]
+        self.assertEqual(100, sample_chunk.first_loop_start)
+        self.assertEqual(200, sample_chunk.first_loop_end)
+
+    def test_hardlinked_source_is_not_patched(self):
+        source = os.path.join(self.directory.name, "source.wav")
+        shutil.copyfile(FILE_PATH, source)
+        SamplePlan(source, self.destination, link_mode=LINK_MODE_HARDLINK).execute()
+        looped_destination = os.path.join(self.directory.name, "looped.wav")
+        SamplePlan(
+            source,
+            looped_destination,
+            SampleEdit(loop_start=100, loop_end=200),
+            link_mode=LINK_MODE_HARDLINK,
+        ).execute()
+        self.assertFalse(os.path.samefile(source, looped_destination))
+        with open(FILE_PATH, "rb") as original, open(source, "rb") as reader:
+            self.assertEqual(original.read(), reader.read())
+
+    def test_looped_samples_are_converted_to_wav(self):
+        sample_plan = SamplePlan(
+            "samples/a.ogg", os.path.join("patch", "a.ogg"), SampleEdit(loop_end=100)
+        )
+        self.assertTrue(sample_plan.is_converted)
+        self.assertEqual(os.path.join("patch", "a.wav"), sample_plan.destination)
+        self.assertFalse(
+            SamplePlan("samples/a.ogg", "a.ogg", SampleEdit(offset=10)).is_converted
+        )
+
+
+class TestExecuteSamplePlans(TestCase):
+    def test_parallel_execution(self):
+        with TemporaryDirectory() as directory:
+            sample_plans = [
+                SamplePlan(FILE_PATH, os.path.join(directory, "a.wav")),
+                SamplePlan(
+                    FILE_PATH,
+                    os.path.join(directory, "b.wav"),
+                    SampleEdit(offset=100, loop_end=200),
+                ),
+                SamplePlan(
+                    FILE_PATH, os.path.join(directory, "c.wav"), SampleEdit(end=100)
+                ),
+            ]
+            self.assertEqual(
+                asyncio.run(execute_sample_plans(sample_plans)),
+                asyncio.run(execute_sample_plans(sample_plans, jobs=3)),
+            )
+            for sample_plan in sample_plans:
+                self.assertTrue(os.path.exists(sample_plan.destination))
+
+    def test_decodes_are_batched(self):
+        with TemporaryDirectory() as directory:
+            source = os.path.join(directory, "tone.flac")
+            asyncio.run(
+                FfmpegScheduler().run_batch([Transcode(FILE_PATH, source, "flac")])
+            )
+            sample_plans = [
+                SamplePlan(
+                    source,
+                    os.path.join(directory, f"{index}.flac"),
+                    SampleEdit(end=100),
+                )
+                for index in range(3)
+            ]
+            sample_plans.append(
+                SamplePlan(
+                    source,
+                    os.path.join(directory, "looped.flac"),
+                    SampleEdit(loop_start=10, loop_end=20),
+                )
+            )
+            with patch(
+                "nanostudio_2_sample_converter.formats.sfz.utils.ffmpeg.create_batch_command",
+                wraps=create_batch_command,
+            ) as mock_create_batch_command:
+                self.assertEqual(
+                    [False] * 4,
+                    asyncio.run(execute_sample_plans(sample_plans, batch_size=3)),
+                )
+            self.assertEqual(
+                [3, 1],
+                [
+                    len(call.args[0])
+                    for call in mock_create_batch_command.call_args_list
+                ],
+            )
+            self.assertEqual(
+                100, AudioSegment.from_file(sample_plans[0].destination).frame_count()
+            )
+            with open(sample_plans[3].destination, "rb") as reader:
+                sample_chunk = RiffChunkExtended.from_file(reader).sub_chunks[
+                    RiffChunkExtended.CHUNK_SAMPLE
+                ]
+            self.assertEqual(10, sample_chunk.first_loop_start)
+            self.assertEqual(20, sample_chunk.first_loop_end)
+            self.assertEqual(16, probe(sample_plans[3].destination).bits_per_sample)
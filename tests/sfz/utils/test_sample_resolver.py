@@ -0,0 +1,93 @@
+import os
+import unicodedata
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+from nanostudio_2_sample_converter.formats.sfz.utils.sample_resolver import (
+    SamplePathResolver,
+    split_sample_path,
+)
+
+
+class TestSamplePathResolver(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.base = self.directory.name
+        for path in [
+            "Samples/Piano C4.WAV",
+            "Samples/Strings/Violin.wav",
+            unicodedata.normalize("NFD", "Samples/Café.wav"),
+        ]:
+            os.makedirs(os.path.dirname(os.path.join(self.base, path)), exist_ok=True)
+            with open(os.path.join(self.base, path), "wb") as writer:
+                writer.write(b"RIFF")
+        self.resolver = SamplePathResolver([self.base])
+
+    def test_split_sample_path(self):
+        self.assertEqual(("", ["a", "b.wav"]), split_sample_path("a\\.\\b.wav"))
+        self.assertEqual(("/", ["a", "b.wav"]), split_sample_path("/a//b.wav"))
+
+    def test_exact_path(self):
+        self.assertEqual(
+            os.path.join(self.base, "Samples", "Piano C4.WAV"),
+            self.resolver.resolve("Samples/Piano C4.WAV"),
+        )
+
+    def test_backslashes_and_case(self):
+        self.assertEqual(
+            os.path.join(self.base, "Samples", "Strings", "Violin.wav"),
+            self.resolver.resolve("samples\\STRINGS\\violin.WAV"),
+        )
+
+    def test_unicode_normalization(self):
+        resolved_path = self.resolver.resolve(
+            unicodedata.normalize("NFC", "samples/café.wav")
+        )
+        self.assertIsNotNone(resolved_path)
+        self.assertTrue(os.path.isfile(resolved_path))
+
+    def test_parent_directory_and_absolute_paths(self):
+        self.assertEqual(
+            os.path.join(self.base, "Samples", "Strings", "..", "Piano C4.WAV"),
+            self.resolver.resolve("samples/strings/../piano c4.wav"),
+        )
+        absolute_path = os.path.join(self.base, "Samples", "Piano C4.WAV")
+        self.assertTrue(
+            os.path.samefile(
+                absolute_path, SamplePathResolver([]).resolve(absolute_path)
+            )
+        )
+
+    def test_missing_samples(self):
+        self.assertIsNone(self.resolver.resolve("Samples/Missing.wav"))
+        self.assertIsNone(self.resolver.resolve("Missing/Piano C4.WAV"))
+        self.assertIsNone(self.resolver.resolve("Samples/Strings"))
+        self.assertIsNone(self.resolver.resolve("Samples/Piano C4.WAV/a.wav"))
+        self.assertIsNone(self.resolver.resolve(""))
+
+    def test_exact_match_is_preferred(self):
+        samples_path = os.path.join(self.base, "Samples")
+        with open(os.path.join(samples_path, "piano c4.wav"), "wb") as writer:
+            writer.write(b"RIFF")
+        if len(os.listdir(samples_path)) < 4:
+            self.skipTest("file system is not case sensitive.")
+        resolver = SamplePathResolver([self.base])
+        self.assertEqual(
+            os.path.join(samples_path, "piano c4.wav"),
+            resolver.resolve("Samples/piano c4.wav"),
+        )
+        self.assertEqual(
+            os.path.join(samples_path, "Piano C4.WAV"),
+            resolver.resolve("Samples/Piano C4.WAV"),
+        )
+
+    def test_directories_are_listed_once(self):
+        with patch(
+            "nanostudio_2_sample_converter.formats.sfz.utils.sample_resolver.os.scandir",
+            wraps=os.scandir,
+        ) as mock_scandir:
+            for _ in range(3):
+                self.resolver.resolve("samples/piano c4.wav")
+                self.resolver.resolve("samples/strings/violin.wav")
+        self.assertEqual(3, mock_scandir.call_count)
@@ -0,0 +1,126 @@
+import os
+import time
+from unittest import TestCase, skipUnless
+from nanostudio_2_sample_converter.formats.sfz.utils.tokenizer import (
+    tokenize,
+    tokenize_file,
+    HEADER_TOKEN,
+    OPCODE_TOKEN,
+    INCLUDE_TOKEN,
+    DEFINE_TOKEN,
+)
+from tests.sfz.manifest import SFZ, EXAMPLES
+
+DIR_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+MIN_BYTES_PER_SECOND = 1000000
+
+
+class TestTokenizer(TestCase):
+    def test_headers_and_opcodes(self):
+        tokens = list(tokenize("<group> lovel=0 hivel=63\n<region>sample=a.wav"))
+        self.assertEqual(
+            [
+                (HEADER_TOKEN, "group", None),
+                (OPCODE_TOKEN, "lovel", "0"),
+                (OPCODE_TOKEN, "hivel", "63"),
+                (HEADER_TOKEN, "region", None),
+                (OPCODE_TOKEN, "sample", "a.wav"),
+            ],
+            tokens,
+        )
+
+    def test_comments(self):
+        sfz_string = (
+            "//<group> lovel=1\n"
+            "<region> sample=a.wav // key=60\n"
+            "/* <region>\n sample=b.wav */ key=61 // trailing"
+        )
+        self.assertEqual(
+            [
+                (HEADER_TOKEN, "region", None),
+                (OPCODE_TOKEN, "sample", "a.wav"),
+                (OPCODE_TOKEN, "key", "61"),
+            ],
+            list(tokenize(sfz_string)),
+        )
+
+    def test_sample_paths_with_spaces(self):
+        tokens = list(
+            tokenize("<region> sample=My Samples\\Piano C4.wav  lokey=60\r\nhikey=62")
+        )
+        self.assertEqual(
+            [
+                (HEADER_TOKEN, "region", None),
+                (OPCODE_TOKEN, "sample", "My Samples\\Piano C4.wav"),
+                (OPCODE_TOKEN, "lokey", "60"),
+                (OPCODE_TOKEN, "hikey", "62"),
+            ],
+            tokens,
+        )
+
+    def test_quoted_values(self):
+        tokens = list(tokenize('<region> sample="a b=c.wav" label="x < y"'))
+        self.assertEqual(
+            [
+                (HEADER_TOKEN, "region", None),
+                (OPCODE_TOKEN, "sample", "a b=c.wav"),
+                (OPCODE_TOKEN, "label", "x < y"),
+            ],
+            tokens,
+        )
+
+    def test_preprocessor_directives(self):
+        tokens = list(
+            tokenize(
+                "#define $KEY 60 // root\n<region> sample=$PATH/a.wav lokey=c#4 "
+                '#include "map.sfz"\nkey=$KEY amp_velcurve_$N=1'
+            )
+        )
+        self.assertEqual(
+            [
+                (DEFINE_TOKEN, "$KEY", "60"),
+                (HEADER_TOKEN, "region", None),
+                (OPCODE_TOKEN, "sample", "$PATH/a.wav"),
+                (OPCODE_TOKEN, "lokey", "c#4"),
+                (INCLUDE_TOKEN, "map.sfz", None),
+                (OPCODE_TOKEN, "key", "$KEY"),
+                (OPCODE_TOKEN, "amp_velcurve_$N", "1"),
+            ],
+            tokens,
+        )
+
+    def test_tokenize_file(self):
+        sfz_path = os.path.join(DIR_PATH, EXAMPLES[1]["sfz"])
+        tokens = list(tokenize_file(sfz_path))
+        self.assertEqual(4, tokens.count((HEADER_TOKEN, "region", None)))
+        self.assertIn((OPCODE_TOKEN, "sample", "samples\\mf-taiko-v2.ogg"), tokens)
+
+
+@skipUnless(
+    os.environ.get("NS2_BENCHMARK"), "set NS2_BENCHMARK to run throughput tests."
+)
+class TestTokenizerThroughput(TestCase):
+    def test_regression_suite_throughput(self):
+        sfz_paths = [os.path.join(DIR_PATH, sfz["sfz"]) for sfz in SFZ]
+        sfz_paths = [sfz_path for sfz_path in sfz_paths if os.path.exists(sfz_path)]
+        if not sfz_paths:
+            self.skipTest("sfz regression test suite files not found.")
+        total_bytes = 0
+        total_tokens = 0
+        start = time.perf_counter()
+        for sfz_path in sfz_paths:
+            total_bytes += os.path.getsize(sfz_path)
+            total_tokens += sum(1 for _ in tokenize_file(sfz_path))
+        elapsed = time.perf_counter() - start
+        self.assertGreater(total_tokens, 0)
+        self.assertGreater(total_bytes / elapsed, MIN_BYTES_PER_SECOND)
+
+    def test_large_file_throughput(self):
+        sfz_path = os.path.join(DIR_PATH, EXAMPLES[0]["sfz"])
+        with open(sfz_path, "r", encoding="utf-8", errors="ignore") as reader:
+            sfz_string = reader.read() * 500
+        start = time.perf_counter()
+        total_tokens = sum(1 for _ in tokenize(sfz_string))
+        elapsed = time.perf_counter() - start
+        self.assertGreater(total_tokens, 0)
+        self.assertGreater(len(sfz_string) / elapsed, MIN_BYTES_PER_SECOND)
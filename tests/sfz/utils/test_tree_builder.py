@@ -0,0 +1,77 @@
+from unittest import TestCase
+from nanostudio_2_sample_converter.formats.sfz.headers import (
+    Control,
+    Global,
+    Group,
+    Region,
+)
+from nanostudio_2_sample_converter.formats.sfz.utils.tokenizer import tokenize
+from nanostudio_2_sample_converter.formats.sfz.utils.tree_builder import (
+    build_tree,
+    convert_opcode_value,
+)
+
+
+class TestTreeBuilder(TestCase):
+    def test_build_tree(self):
+        control = build_tree(
+            tokenize(
+                "lovel=1 <control> default_path=a/ <group> lovel=0 hivel=63 "
+                "<region> sample=a.wav lokey=c4 <effect> type=reverb <region> sample=b.wav"
+            )
+        )
+        self.assertIsInstance(control, Control)
+        self.assertEqual({"default_path": "a/"}, control.opcodes)
+        self.assertEqual(1, len(control.children))
+        self.assertIsInstance(control.children[0], Global)
+        groups = list(control.iter_groups())
+        self.assertEqual(1, len(groups))
+        self.assertEqual({"lovel": 0, "hivel": 63}, groups[0].opcodes)
+        regions = list(control.iter_regions())
+        self.assertEqual(2, len(regions))
+        self.assertEqual({"sample": "a.wav", "lokey": 60}, regions[0].opcodes)
+        self.assertEqual({"sample": "b.wav"}, regions[1].opcodes)
+
+    def test_implicit_parent_headers(self):
+        control = build_tree(tokenize("<region> sample=a.wav <region> sample=b.wav"))
+        groups = list(control.iter_groups())
+        self.assertEqual(1, len(groups))
+        self.assertIsInstance(groups[0], Group)
+        self.assertTrue(
+            all(isinstance(region, Region) for region in groups[0].children)
+        )
+        self.assertEqual(2, len(groups[0].children))
+
+    def test_master_opcodes_are_copied_into_groups(self):
+        control = build_tree(
+            tokenize(
+                "<master> loop_mode=loop_continuous tune=5 "
+                "<group> tune=7 <region> sample=a.wav <region> sample=b.wav "
+                "<master> loop_mode=one_shot <region> sample=c.wav "
+                "<global> <group> <region> sample=d.wav"
+            )
+        )
+        self.assertEqual(
+            [
+                {"loop_mode": "loop_continuous", "tune": 7},
+                {"loop_mode": "one_shot"},
+                {},
+            ],
+            [group.opcodes for group in control.iter_groups()],
+        )
+        self.assertEqual(4, len(list(control.iter_regions())))
+
+    def test_unsupported_opcodes_are_dropped(self):
+        control = build_tree(tokenize("<region> sample=a.wav ampeg_release=1"))
+        self.assertEqual({"sample": "a.wav"}, next(control.iter_regions()).opcodes)
+
+    def test_values_are_rendered_escaped(self):
+        control = build_tree(tokenize('<region> sample="a\'b&c<d.wav"'))
+        element = control.to_xml()
+        self.assertEqual("a'b&c<d.wav", element.find(".//region").get("sample"))
+
+    def test_convert_opcode_value(self):
+        self.assertEqual(60, convert_opcode_value("lokey", "60"))
+        self.assertEqual(61, convert_opcode_value("hikey", "c#4"))
+        self.assertEqual(-12, convert_opcode_value("tune", "-12"))
+        self.assertEqual("a.wav", convert_opcode_value("sample", "a.wav"))
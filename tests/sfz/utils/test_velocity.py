@@ -0,0 +1,51 @@
+from unittest import TestCase
+from nanostudio_2_sample_converter.formats.sfz.headers import Group
+from nanostudio_2_sample_converter.formats.sfz.utils.velocity import (
+    resolve_velocity_layers,
+    get_split_3_levels,
+)
+
+
+def create_group(lovel, hivel):
+    return Group({"lovel": lovel, "hivel": hivel})
+
+
+class TestVelocity(TestCase):
+    def test_resolve_velocity_layers_sorted(self):
+        groups = [create_group(64, 127), create_group(0, 31), create_group(32, 63)]
+        layers = resolve_velocity_layers(groups)
+        self.assertEqual([groups[1], groups[2], groups[0]], layers)
+
+    def test_resolve_velocity_layers_overlap(self):
+        groups = [
+            create_group(0, 63),
+            create_group(0, 127),
+            create_group(32, 90),
+            create_group(64, 127),
+            create_group(64, 100),
+        ]
+        layers = resolve_velocity_layers(groups)
+        self.assertEqual([groups[0], groups[4]], layers)
+
+    def test_resolve_velocity_layers_duplicates_keep_document_order(self):
+        groups = [create_group(0, 127), create_group(0, 127)]
+        self.assertEqual([groups[0]], resolve_velocity_layers(groups))
+
+    def test_resolve_velocity_layers_large(self):
+        groups = [create_group(index % 128, index % 128) for index in range(10000)]
+        layers = resolve_velocity_layers(reversed(groups))
+        self.assertEqual(list(range(128)), [layer.lovel for layer in layers])
+
+    def test_get_split_3_levels(self):
+        self.assertEqual((None, None), get_split_3_levels([]))
+        self.assertEqual(("1.0", "1.0"), get_split_3_levels([create_group(0, 127)]))
+        self.assertEqual(
+            (str(63 / 127), "1.0"),
+            get_split_3_levels([create_group(0, 63), create_group(64, 127)]),
+        )
+        self.assertEqual(
+            (str(40 / 127), str(90 / 127)),
+            get_split_3_levels(
+                [create_group(0, 40), create_group(41, 89), create_group(90, 127)]
+            ),
+        )
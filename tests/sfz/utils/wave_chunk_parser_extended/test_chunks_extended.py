@@ -1,5 +1,8 @@
 # pylint: disable=too-many-instance-attributes, too-many-arguments
 from unittest import TestCase
+from array import array
+from io import BytesIO
+from struct import pack, unpack_from
 import os
 from typing import List
 from parameterized import parameterized
@@ -15,6 +18,7 @@ from wave_chunk_parser.chunks import (
 from nanostudio_2_sample_converter.formats.sfz.utils.wave_chunk_parser_extended.chunks_extended import (
     SampleChunk,
     RiffChunkExtended,
+    RiffChunkIndex,
 )
 
 DIR_PATH = os.path.dirname(os.path.realpath(__file__))
@@ -137,8 +141,6 @@ class TestSampleChunk(TestCase):
                 0,
                 0,
                 0,
-                1,
-                0,
                 0,
                 0,
                 37485,
@@ -161,8 +163,6 @@ class TestSampleChunk(TestCase):
         midi_pitch_fraction: int,
         smpte_format: int,
         smpte_offset: int,
-        number_of_sample_loops: int,
-        sampler_data: int,
         first_cue_point_id: int,
         first_loop_type: int,
         first_loop_start: int,
@@ -185,8 +185,6 @@ class TestSampleChunk(TestCase):
             midi_pitch_fraction,
             smpte_format,
             smpte_offset,
-            number_of_sample_loops,
-            sampler_data,
             first_cue_point_id,
             first_loop_type,
             first_loop_start,
@@ -203,6 +201,94 @@ class TestSampleChunk(TestCase):
 
         self.assertEqual(converted, expected_bytes)
 
+    def test_multiple_loops(self):
+        """
+        Sample chunks with several loops and sampler specific data survive a round trip.
+        """
+
+        # Arrange
+
+        loops = array("I", [1, 0, 100, 200, 0, 0, 2, 0, 300, 400, 0, 3])
+        chunk = SampleChunk(
+            0,
+            0,
+            22675,
+            60,
+            0,
+            0,
+            0,
+            loops=loops,
+            sampler_specific_data=b"abc",
+        )
+
+        # Act
+
+        blob = chunk.to_bytes()
+        decoded: SampleChunk = SampleChunk.from_file(BytesIO(blob), 0)
+
+        # Assert
+
+        self.assertEqual(8 + 36 + 48 + 3, len(blob))
+        self.assertEqual(2, decoded.loop_count)
+        self.assertEqual(loops, decoded.loops)
+        self.assertEqual((2, 0, 300, 400, 0, 3), decoded.get_loop(1))
+        self.assertEqual(100, decoded.first_loop_start)
+        self.assertEqual(b"abc", decoded.sampler_specific_data)
+        self.assertEqual(blob, decoded.to_bytes())
+        with self.assertRaises(IndexError):
+            decoded.get_loop(2)
+
+    def test_loop_count_follows_loops(self):
+        """
+        The loop count and sampler data length written are those of the loops and data given.
+        """
+
+        # Arrange
+
+        chunk = SampleChunk(
+            0,
+            0,
+            22675,
+            60,
+            0,
+            0,
+            0,
+            loops=array("I", [1, 0, 100, 200, 0, 0, 2, 0, 300, 400, 0, 3]),
+            sampler_specific_data=b"abc",
+        )
+
+        # Act
+
+        blob = chunk.to_bytes()
+        decoded: SampleChunk = SampleChunk.from_file(BytesIO(blob), 0)
+
+        # Assert
+
+        self.assertEqual((2, 3), unpack_from("<II", blob, 36))
+        self.assertEqual(2, decoded.loop_count)
+        self.assertEqual(2, chunk.number_of_sample_loops)
+        self.assertEqual(3, chunk.sampler_data)
+        self.assertEqual(b"abc", decoded.sampler_specific_data)
+
+    def test_no_loops(self):
+        """
+        Sample chunks without loops are read without reading past the chunk.
+        """
+
+        # Arrange
+
+        blob = SampleChunk(0, 0, 22675, 60, 0, 0, 0, loops=array("I")).to_bytes()
+
+        # Act
+
+        decoded: SampleChunk = SampleChunk.from_file(BytesIO(blob + b"JUNK"), 0)
+
+        # Assert
+
+        self.assertEqual(44, len(blob))
+        self.assertEqual(0, decoded.loop_count)
+        self.assertEqual(0, decoded.first_loop_end)
+
 
 class TestRiffChunkExtended(TestCase):
     @parameterized.expand(
@@ -252,8 +338,6 @@ class TestRiffChunkExtended(TestCase):
             0,
             0,
             0,
-            1,
-            0,
             0,
             0,
             37485,
@@ -282,3 +366,103 @@ class TestRiffChunkExtended(TestCase):
 
         self.assertIsNotNone(blob)
         self.assertEqual(blob, expected_blob)
+
+
+class TestRiffChunkIndex(TestCase):
+    def test_index_wave(self):
+        """
+        Chunk headers of a wave file are indexed without reading the chunk contents.
+        """
+
+        # Arrange
+
+        with open(os.path.join(DIR_PATH, "./files/tone.wav"), "rb") as file:
+
+            # Act
+
+            with RiffChunkIndex(file) as riff_index:
+
+                # Assert
+
+                self.assertEqual(
+                    [(b"fmt ", 20, 16), (b"data", 44, 75172), (b"smpl", 75224, 60)],
+                    riff_index.entries,
+                )
+                self.assertIn(b"smpl", riff_index)
+                self.assertNotIn(b"cue ", riff_index)
+                self.assertEqual(16, len(riff_index.read(b"fmt ")))
+                self.assertEqual(b"fmt ", riff_index.read_raw(b"fmt ")[:4])
+                with riff_index.data_view() as data:
+                    self.assertEqual(75172, len(data))
+                    file.seek(44)
+                    self.assertEqual(file.read(16), bytes(data[:16]))
+
+    def test_index_invalid_header(self):
+        """
+        An appropriate error is raised if the file is not a wave file.
+        """
+
+        # Act
+
+        with self.assertRaises(InvalidHeaderException) as context:
+            RiffChunkIndex(BytesIO(b"RIFF\x04\x00\x00\x00AVI "))
+
+        # Assert
+
+        self.assertEqual(
+            "This library only supports WAVE files", context.exception.args[0]
+        )
+
+    def test_overwrite_chunk_in_place(self):
+        """
+        A chunk with the same id and length is overwritten without moving any other chunk.
+        """
+
+        # Arrange
+
+        with open(os.path.join(DIR_PATH, "./files/tone.wav"), "rb") as file:
+            buffer = BytesIO(file.read())
+        smpl = b"smpl" + pack("<I", 60) + bytes(range(60))
+
+        # Act
+
+        with RiffChunkIndex(buffer) as riff_index:
+            riff_index.write_chunk(smpl)
+
+        # Assert
+
+        self.assertEqual(75284, len(buffer.getvalue()))
+        self.assertEqual(smpl, buffer.getvalue()[75216:])
+
+    def test_append_chunk(self):
+        """
+        New chunks are appended after the last chunk, other chunks are kept and the RIFF
+        size is patched. A chunk of a different length replaces the old one, which becomes JUNK.
+        """
+
+        # Arrange
+
+        fmt = FormatChunk(WaveFormat.PCM, False, 1, 44100, 16).to_bytes()
+        data = b"data" + pack("<I", 4) + b"\x01\x00\x02\x00"
+        info = b"LIST" + pack("<I", 5) + b"INFOx\x00"
+        buffer = BytesIO(
+            b"RIFF" + pack("<I", 4 + 24 + 12 + 14) + b"WAVE" + fmt + data + info
+        )
+        smpl = b"smpl" + pack("<I", 60) + bytes(60)
+
+        # Act
+
+        with RiffChunkIndex(buffer) as riff_index:
+            riff_index.write_chunk(smpl)
+            riff_index.write_chunk(b"smpl" + pack("<I", 84) + bytes(84))
+
+        # Assert
+
+        with RiffChunkIndex(buffer) as riff_index:
+            self.assertEqual(
+                [b"fmt ", b"data", b"LIST", b"JUNK", b"smpl"],
+                [chunk_id for (chunk_id, _, _) in riff_index.entries],
+            )
+            self.assertEqual(b"INFOx", riff_index.read(b"LIST"))
+            self.assertEqual(84, len(riff_index.read(b"smpl")))
+            self.assertEqual(len(buffer.getvalue()) - 8, riff_index.riff_length)
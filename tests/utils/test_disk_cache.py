@@ -0,0 +1,64 @@
+import hashlib
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from nanostudio_2_sample_converter.utils.disk_cache import (
+    DiskCache,
+    hash_file,
+    hash_key,
+)
+
+
+class TestDiskCache(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_hash_key(self):
+        self.assertEqual(hash_key("a", b"b"), hash_key(b"a", "b"))
+        self.assertNotEqual(hash_key("ab", "c"), hash_key("a", "bc"))
+
+    def test_get_and_put(self):
+        disk_cache = DiskCache(os.path.join(self.directory.name, "cache"), 1024)
+        self.assertIsNone(disk_cache.get("key"))
+        disk_cache.put("key", b"value")
+        self.assertEqual(b"value", disk_cache.get("key"))
+        disk_cache.put("key", b"other value")
+        self.assertEqual(b"other value", disk_cache.get("key"))
+        self.assertEqual(
+            ["key.bin"], os.listdir(os.path.join(self.directory.name, "cache"))
+        )
+
+    def test_least_recently_used_eviction(self):
+        disk_cache = DiskCache(self.directory.name, 25)
+        disk_cache.put("a", b"0" * 10)
+        disk_cache.put("b", b"1" * 10)
+        os.utime(os.path.join(self.directory.name, "a.bin"), ns=(1, 1))
+        os.utime(os.path.join(self.directory.name, "b.bin"), ns=(2, 2))
+        disk_cache.get("a")
+        disk_cache.put("c", b"2" * 10)
+        self.assertEqual(b"0" * 10, disk_cache.get("a"))
+        self.assertIsNone(disk_cache.get("b"))
+        self.assertEqual(b"2" * 10, disk_cache.get("c"))
+
+    def test_hash_file(self):
+        path = os.path.join(self.directory.name, "file")
+        with open(path, "wb") as writer:
+            writer.write(b"value")
+        self.assertEqual(hashlib.sha256(b"value").digest(), hash_file(path))
+
+    def test_copy_to_and_put_file(self):
+        disk_cache = DiskCache(os.path.join(self.directory.name, "cache"), 1024)
+        source = os.path.join(self.directory.name, "source")
+        destination = os.path.join(self.directory.name, "destination")
+        with open(source, "wb") as writer:
+            writer.write(b"value")
+        self.assertFalse(disk_cache.copy_to("key", destination))
+        self.assertFalse(os.path.exists(destination))
+        disk_cache.put_file("key", source)
+        self.assertTrue(disk_cache.copy_to("key", destination))
+        with open(destination, "rb") as reader:
+            self.assertEqual(b"value", reader.read())
+        self.assertEqual(
+            ["key.bin"], os.listdir(os.path.join(self.directory.name, "cache"))
+        )
@@ -0,0 +1,59 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import Mock, patch
+from nanostudio_2_sample_converter.utils.file_copy import (
+    LINK_MODE_AUTO,
+    LINK_MODE_COPY,
+    LINK_MODE_HARDLINK,
+    LINK_MODES,
+    copy_file,
+)
+
+
+class TestFileCopy(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.source = os.path.join(self.directory.name, "source")
+        with open(self.source, "wb") as writer:
+            writer.write(b"sample" * 1000)
+
+    def assert_copied(self, destination):
+        with open(self.source, "rb") as source, open(destination, "rb") as copy:
+            self.assertEqual(source.read(), copy.read())
+
+    def test_link_modes(self):
+        for link_mode in LINK_MODES:
+            destination = os.path.join(self.directory.name, link_mode)
+            self.assertIsNotNone(copy_file(self.source, destination, link_mode))
+            self.assert_copied(destination)
+
+    def test_copy_does_not_link(self):
+        destination = os.path.join(self.directory.name, "destination")
+        self.assertEqual("copy", copy_file(self.source, destination, LINK_MODE_COPY))
+        self.assertFalse(os.path.samefile(self.source, destination))
+
+    def test_hardlink(self):
+        destination = os.path.join(self.directory.name, "destination")
+        with open(destination, "wb") as writer:
+            writer.write(b"existing")
+        strategy = copy_file(self.source, destination, LINK_MODE_HARDLINK)
+        self.assert_copied(destination)
+        if strategy == "hardlink":
+            self.assertTrue(os.path.samefile(self.source, destination))
+
+    def test_fallback_to_copy(self):
+        destination = os.path.join(self.directory.name, "destination")
+        with patch(
+            "nanostudio_2_sample_converter.utils.file_copy.fcntl",
+            Mock(ioctl=Mock(side_effect=OSError)),
+        ), patch(
+            "nanostudio_2_sample_converter.utils.file_copy.os.copy_file_range",
+            side_effect=OSError,
+            create=True,
+        ):
+            self.assertEqual(
+                "copy", copy_file(self.source, destination, LINK_MODE_AUTO)
+            )
+        self.assert_copied(destination)
@@ -6,6 +6,9 @@ from nanostudio_2_sample_converter.utils.exceptions import (
     ConverterUnsupportedSourceFormatException,
     ConverterDestinationException,
     ConverterUnsupportedDestinationFormatException,
+    ConverterJobsException,
+    ConverterTimeoutException,
+    ConverterCacheSizeException,
 )
 
 
@@ -69,6 +72,53 @@ class TestValidateArgs(TestCase):
             context.exception.args[0],
         )
 
+    def test_jobs_not_positive(self):
+        args = self.parser.parse_args(
+            ["--source", "test.sfz", "--destination", "destinationDir", "--jobs", "0"]
+        )
+        with self.assertRaises(ConverterJobsException) as context:
+            create_args(args)
+        self.assertEqual(
+            "Error! --jobs must be at least 1.",
+            context.exception.args[0],
+        )
+
+    def test_cache_size_not_positive(self):
+        args = self.parser.parse_args(
+            [
+                "--source",
+                "test.sfz",
+                "--destination",
+                "destinationDir",
+                "--cache-size",
+                "0",
+            ]
+        )
+        with self.assertRaises(ConverterCacheSizeException) as context:
+            create_args(args)
+        self.assertEqual(
+            "Error! --cache-size must be at least 1.",
+            context.exception.args[0],
+        )
+
+    def test_timeout_not_positive(self):
+        args = self.parser.parse_args(
+            [
+                "--source",
+                "test.sfz",
+                "--destination",
+                "destinationDir",
+                "--timeout",
+                "0",
+            ]
+        )
+        with self.assertRaises(ConverterTimeoutException) as context:
+            create_args(args)
+        self.assertEqual(
+            "Error! --timeout must be greater than 0.",
+            context.exception.args[0],
+        )
+
     def test_valid_args_no_format(self):
         args = self.parser.parse_args(
             ["--source", "test.sfz", "--destination", "destinationDir"]
@@ -79,6 +129,12 @@ class TestValidateArgs(TestCase):
                 "destination": "destinationDir",
                 "destination_format": "obs",
                 "source": "test.sfz",
+                "timings": False,
+                "no_cache": False,
+                "cache_size": None,
+                "jobs": 1,
+                "timeout": None,
+                "link_mode": "auto",
             },
             response,
         )
@@ -100,6 +156,12 @@ class TestValidateArgs(TestCase):
                 "destination": "destinationDir",
                 "destination_format": "obs",
                 "source": "test.sfz",
+                "timings": False,
+                "no_cache": False,
+                "cache_size": None,
+                "jobs": 1,
+                "timeout": None,
+                "link_mode": "auto",
             },
             response,
         )